@@ -5,12 +5,34 @@ Generates printable card PDFs from JSON data or config files
 Supports multiple card types: fact cards, character cards, rumor cards, etc.
 """
 
+import os
+import re
+import sys
 import json
-import math
-import textwrap
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.contact_sheet import PREVIEW_DPI, contact_sheet, preview_scale
+from shared.fonts import get_font, resolve_role
+from shared.image_cache import shared_image_cache
+from shared.qr import SITE_URL, qr_image, qr_url_for, qrcode_available
+from shared.pdf_writer import PAGE_MODES, PDFPageWriter, canvas_mode, encode_page, reduce_page
+from shared.sheet_layout import draw_crop_marks, plan_sheet
+from shared.render_cache import CACHE_ROOT, TileCache, content_key, file_fingerprint, source_fingerprint
+from shared.text_layout import fit_text
+
+DEFAULT_TILE_CACHE_DIR = CACHE_ROOT / 'card_tiles'
+
+# Config keys that don't change how an individual card looks
+TILE_INDEPENDENT_KEYS = {
+    'page_size', 'margin', 'data_source', 'data_key', 'items', 'image_cache_mb',
+    'pdf_compression', 'jpeg_quality', 'group_by', 'group_output', 'group_combined',
+    'packing', 'allow_rotation', 'gutter', 'crop_marks', 'crop_mark_length',
+}
 
 def draw_ornate_border(draw, x, y, width, height, line_width=2, color='#8B7355'):
     """Draw ornate 1920s style border"""
@@ -26,19 +48,571 @@ def draw_ornate_border(draw, x, y, width, height, line_width=2, color='#8B7355')
         draw.ellipse([cx - corner_size, cy - corner_size, 
                      cx + corner_size, cy + corner_size], fill=color)
 
-def load_font(size, fallback_sizes=[24, 18, 14]):
-    """Load font with fallbacks"""
-    for font_size in [size] + fallback_sizes:
-        try:
-            return ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", font_size)
-        except:
-            try:
-                return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", font_size)
-            except:
-                pass
-    return ImageFont.load_default()
+def load_font(size):
+    """Card serif font (Georgia or the closest installed match), cached per size"""
+    return get_font('serif', size)
+
+def load_config(config_file):
+    with open(config_file, 'r') as f:
+        return json.load(f)
 
-def create_card_pdf(config_file, output_file):
+def compute_layout(config):
+    """Convert config sizes to pixels and plan where cards go on each sheet"""
+    card_w = config.get('card_size', {}).get('width', 2.5)
+    card_h = config.get('card_size', {}).get('height', 3.5)
+    page_w = config.get('page_size', {}).get('width', 8.5)
+    page_h = config.get('page_size', {}).get('height', 11.0)
+    margin = config.get('margin', 0.5)
+    dpi = config.get('dpi', 72)
+    
+    layout = {
+        'page_w_px': int(page_w * dpi),
+        'page_h_px': int(page_h * dpi),
+        'margin_px': int(margin * dpi),
+        'card_w_px': int(card_w * dpi),
+        'card_h_px': int(card_h * dpi),
+    }
+    
+    # Crop marks sit outside the cards, offset slightly from the corners
+    layout['crop_marks'] = config.get('crop_marks', False)
+    layout['crop_mark_px'] = int(config.get('crop_mark_length', 0.125) * dpi)
+    layout['crop_mark_offset_px'] = max(2, layout['crop_mark_px'] // 6)
+    
+    if config.get('packing', 'auto') == 'grid':
+        allow_rotation = False
+    else:
+        allow_rotation = config.get('allow_rotation', True)
+    plan = plan_sheet(
+        layout['page_w_px'], layout['page_h_px'], layout['margin_px'],
+        layout['card_w_px'], layout['card_h_px'],
+        gutter=int(config.get('gutter', 0) * dpi),
+        allow_rotation=allow_rotation,
+        crop_marks=layout['crop_marks'],
+        crop_mark_len=layout['crop_mark_px'] + layout['crop_mark_offset_px'],
+    )
+    layout['slots'] = plan['slots']
+    layout['cards_per_page'] = plan['per_page']
+    layout['plan'] = plan['description']
+    layout['baseline_per_page'] = plan['baseline_per_page']
+    
+    # Grayscale and black-and-white decks are drawn in 'L' throughout
+    layout['page_mode'] = config.get('page_mode', 'RGB')
+    layout['canvas_mode'] = canvas_mode(layout['page_mode'])
+    
+    # Fonts are sized in points (1/72"), so title, text and small text all
+    # scale with dpi; card text is fitted between these sizes
+    layout['font_scale'] = dpi / 72
+    layout['max_text_size'] = config.get('max_text_size', max(14, int(14 * layout['font_scale'])))
+    layout['min_text_size'] = config.get('min_text_size', 8)
+    return layout
+
+# Parsed data sources keyed by (path, mtime), shared by every deck in a run
+_data_sources = {}
+
+def load_data_source(path):
+    key = (str(Path(path).resolve()), os.stat(path).st_mtime_ns)
+    data = _data_sources.get(key)
+    if data is None:
+        with open(path, 'r') as f:
+            data = _data_sources[key] = json.load(f)
+    return data
+
+def load_items(config):
+    data_source = config.get('data_source')
+    data_key = config.get('data_key', 'rumors')
+    
+    if data_source:
+        return load_data_source(data_source).get(data_key, [])
+    return config.get('items', [])
+
+def load_card_fonts(scale=1.0):
+    """Title, text and small fonts; scale is the layout's font_scale (dpi / 72)"""
+    return {
+        'title': load_font(max(4, int(32 * scale))),
+        'text': load_font(max(4, int(14 * scale))),
+        'small': load_font(max(4, int(10 * scale))),
+    }
+
+def scale_layout(layout, scale):
+    """
+    The same sheet plan at a lower resolution, for previews: every size
+    and slot is scaled from the print layout, so cards land in the same
+    place as in the final PDF.
+    """
+    preview = dict(layout)
+    for key in ('page_w_px', 'page_h_px', 'margin_px', 'card_w_px', 'card_h_px',
+                'crop_mark_px', 'crop_mark_offset_px'):
+        preview[key] = max(1, int(layout[key] * scale))
+    preview['slots'] = [(int(x * scale), int(y * scale), rotated) for x, y, rotated in layout['slots']]
+    preview['max_text_size'] = max(4, int(layout['max_text_size'] * scale))
+    preview['min_text_size'] = max(4, min(preview['max_text_size'], int(layout['min_text_size'] * scale)))
+    preview['font_scale'] = layout['font_scale'] * scale
+    preview['scale'] = scale
+    preview['preview'] = True
+    return preview
+
+def draw_card(page_img, draw, item, x, y, config, layout, fonts, image_cache):
+    """Draw a single card with its top-left corner at (x, y)"""
+    card_w_px = layout['card_w_px']
+    card_h_px = layout['card_h_px']
+    # Offsets are in points like the fonts, so the title and text keep
+    # their spacing at any dpi (and in previews)
+    scale = layout.get('font_scale', 1.0)
+    fast = layout.get('preview', False)
+    
+    def px(value):
+        return int(value * scale)
+    
+    center_x = x + (card_w_px // 2)
+    title_text = config.get('title', 'CARD')
+    fields = config.get('fields', {})
+    
+    # Draw border
+    draw_ornate_border(draw, x, y, card_w_px, card_h_px)
+    
+    # Draw title
+    title_bbox = draw.textbbox((0, 0), title_text, font=fonts['title'])
+    title_w = title_bbox[2] - title_bbox[0]
+    draw.text((center_x - title_w//2, y + px(10)), title_text, 
+             fill='#1a1a1a', font=fonts['title'])
+    
+    current_y = y + px(50)
+    
+    # Load and paste image if template provided
+    img_template = config.get('image_path_template')
+    if img_template and 'id' in item:
+        img_path = img_template.format(**item)
+        img = image_cache.get(img_path, (card_w_px - px(20), int(card_h_px * 0.4)), fast=fast)
+        if img is not None:
+            img_x = center_x - (img.width // 2)
+            page_img.paste(img, (img_x, current_y))
+            current_y += img.height + px(10)
+    
+    # Load and paste photo if template provided
+    photo_template = config.get('photo_path_template')
+    if photo_template and 'id' in item:
+        photo_path = photo_template.format(**item)
+        photo = image_cache.get(photo_path, (card_w_px - px(40), int(card_h_px * 0.25)), fast=fast)
+        if photo is not None:
+            photo_x = center_x - (photo.width // 2)
+            page_img.paste(photo, (photo_x, current_y))
+            current_y += photo.height + px(8)
+    
+    # Draw QR code from its URL (exact pixels per module), or paste the PNG
+    qr_template = config.get('qr_path_template')
+    qr_url = card_qr_url(item, config)
+    if qr_url or (qr_template and 'id' in item):
+        qr_size = int(card_w_px * 0.6)
+        if qr_url:
+            qr = qr_image(qr_url, qr_size)
+        else:
+            qr = image_cache.get(qr_template.format(**item), (qr_size, qr_size), fast=fast)
+        if qr is not None:
+            qr_x = center_x - (qr.width // 2)
+            page_img.paste(qr, (qr_x, current_y))
+            current_y += qr.height + px(8)
+    
+    # Draw text content, at the largest size that fits the space left
+    text_field = fields.get('text') or fields.get('description')
+    if text_field and text_field in item:
+        block = fit_text(
+            item[text_field],
+            box_w=card_w_px - px(20),
+            box_h=y + card_h_px - current_y - px(30),
+            get_font=load_font,
+            max_size=layout['max_text_size'],
+            min_size=layout['min_text_size'],
+        )
+        current_y = block.draw_centered(draw, center_x, current_y, fill='#1a1a1a')
+    
+    # Draw possession/attribution
+    possession_field = fields.get('possession')
+    if possession_field and possession_field in item:
+        pos_text = f"— {item[possession_field].upper()} —"
+        pos_bbox = draw.textbbox((0, 0), pos_text, font=fonts['small'])
+        pos_w = pos_bbox[2] - pos_bbox[0]
+        draw.text((center_x - pos_w//2, y + card_h_px - px(24)),
+                 pos_text, fill='#1a1a1a', font=fonts['small'])
+
+def card_qr_url(item, config):
+    """
+    URL to draw a card's QR code from: qr_url_template if set, otherwise
+    derived from the qr_path_template file name (only for PNGs that
+    exist, so cards without one still get no QR). None means paste the
+    PNG: with "qr_render": "png", without the qrcode package, or for
+    names outside the qr_codes/ naming convention.
+    """
+    if config.get('qr_render', 'matrix') != 'matrix' or 'id' not in item or not qrcode_available():
+        return None
+    if config.get('qr_url_template'):
+        return config['qr_url_template'].format(base_url=SITE_URL, **item)
+    if config.get('qr_path_template'):
+        qr_path = config['qr_path_template'].format(**item)
+        return qr_url_for(qr_path) if os.path.isfile(qr_path) else None
+    return None
+
+def card_label(item):
+    return str(item.get('id', item.get('title', '?')))
+
+def item_image_paths(item, config):
+    """Image, photo and QR files a card uses (whether or not they exist)"""
+    paths = []
+    if 'id' in item:
+        for key in ('image_path_template', 'photo_path_template', 'qr_path_template'):
+            template = config.get(key)
+            if template:
+                paths.append(template.format(**item))
+    return paths
+
+_renderer_fingerprint = None
+
+def tile_key(item, config, layout):
+    """Hash of everything that affects how a card looks"""
+    global _renderer_fingerprint
+    if _renderer_fingerprint is None:
+        shared_dir = Path(__file__).resolve().parent.parent / 'shared'
+        _renderer_fingerprint = source_fingerprint([
+            __file__, shared_dir / 'text_layout.py', shared_dir / 'fonts.py', shared_dir / 'qr.py',
+        ])
+    tile_config = {k: v for k, v in config.items() if k not in TILE_INDEPENDENT_KEYS}
+    return content_key({
+        'item': item,
+        'config': tile_config,
+        'size': [layout[k] for k in ('card_w_px', 'card_h_px', 'max_text_size', 'min_text_size')],
+        'files': file_fingerprint(item_image_paths(item, config) + [resolve_role('serif')]),
+        'renderer': _renderer_fingerprint,
+    })
+
+def render_card_tile(item, config, layout, fonts, image_cache, tile_cache=None):
+    """
+    Return (tile, rebuilt): the card as its own image, taken from the
+    tile cache when nothing that affects it has changed.
+    """
+    key = tile_key(item, config, layout) if tile_cache else None
+    if key:
+        tile = tile_cache.get(key)
+        if tile is not None:
+            return tile, False
+    
+    # Border is drawn inclusive of x + width, so the tile is 1px larger
+    tile = Image.new(layout['canvas_mode'], (layout['card_w_px'] + 1, layout['card_h_px'] + 1),
+                     color='white')
+    draw_card(tile, ImageDraw.Draw(tile), item, 0, 0, config, layout, fonts, image_cache)
+    if key:
+        tile_cache.put(key, tile)
+    return tile, True
+
+def render_page(page_items, config, layout, fonts, image_cache, tile_cache=None):
+    """
+    Render one page from a contiguous slice of items, in slot order.
+    Returns the page and the labels of cards that had to be (re)rendered.
+    """
+    page_img = Image.new(layout['canvas_mode'], (layout['page_w_px'], layout['page_h_px']), color='white')
+    rebuilt = []
+    
+    for item, (x, y, rotated) in zip(page_items, layout['slots']):
+        tile, fresh = render_card_tile(item, config, layout, fonts, image_cache, tile_cache)
+        if rotated:
+            tile = tile.transpose(Image.Transpose.ROTATE_90)
+        page_img.paste(tile, (x, y))
+        if fresh:
+            rebuilt.append(card_label(item))
+    
+    if layout['crop_marks']:
+        draw_crop_marks(ImageDraw.Draw(page_img), layout['slots'][:len(page_items)],
+                        layout['card_w_px'], layout['card_h_px'],
+                        layout['crop_mark_px'], layout['crop_mark_offset_px'])
+    
+    return page_img, rebuilt
+
+def encode_card_page(page_img, config):
+    """Reduce a finished page to its page mode, compress it for the PDF and free its pixels"""
+    stored = reduce_page(page_img, config.get('page_mode', 'RGB'))
+    encoded = encode_page(stored, config.get('pdf_compression', 'jpeg'),
+                          config.get('jpeg_quality', 90))
+    if stored is not page_img:
+        stored.close()
+    page_img.close()
+    return encoded
+
+# Per-process state for pool workers, set once by _init_worker
+_worker = {}
+
+def _init_worker(deck_settings, cache_mb, tile_dir):
+    _worker['decks'] = deck_settings
+    _worker['image_cache'] = shared_image_cache(cache_mb)
+    _worker['tile_cache'] = TileCache(tile_dir) if tile_dir else None
+
+def _render_page_task(task):
+    deck_index, page_items = task
+    config, layout = _worker['decks'][deck_index]
+    cache = _worker['image_cache']
+    start = time.perf_counter()
+    fonts = load_card_fonts(layout['font_scale'])
+    page_img, rebuilt = render_page(page_items, config, layout, fonts, cache, _worker['tile_cache'])
+    encoded = encode_card_page(page_img, config)
+    seconds = time.perf_counter() - start
+    return deck_index, encoded, seconds, rebuilt, (os.getpid(), cache.hits, cache.misses)
+
+def make_deck(config, output_file, name=None):
+    """Bundle a deck's config, pixel layout and items for rendering"""
+    return {
+        'name': name or Path(output_file).stem,
+        'output': output_file,
+        'config': config,
+        'layout': compute_layout(config),
+        'items': load_items(config),
+    }
+
+def group_output_path(output_file, template, group, used):
+    """Output file for one group; groups that sanitise to the same name get _2, _3, ..."""
+    stem = re.sub(r'[^\w-]+', '_', str(group)).strip('_') or 'none'
+    safe, n = stem, 1
+    while safe.lower() in used:
+        n += 1
+        safe = f"{stem}_{n}"
+    used.add(safe.lower())
+    if template:
+        return template.format(group=safe)
+    output = Path(output_file)
+    return str(output.with_name(f"{output.stem}_{safe}{output.suffix}"))
+
+def split_deck(deck):
+    """
+    Shard a deck into one deck per value of config "group_by" (e.g. each
+    fact's "character"), in a single pass over its items. Values are
+    grouped by their string form, so lists and numbers work too. Group
+    order follows first appearance; "group_combined" also keeps the full deck.
+    """
+    config = deck['config']
+    key = config.get('group_by')
+    if not key:
+        return [deck]
+    
+    groups = {}
+    for item in deck['items']:
+        groups.setdefault(str(item.get(key, 'none')), []).append(item)
+    
+    decks = [deck] if config.get('group_combined') else []
+    used = set()
+    for group, items in groups.items():
+        output = group_output_path(deck['output'], config.get('group_output'), group, used)
+        decks.append({
+            'name': f"{deck['name']}:{group}",
+            'output': output,
+            'config': config,
+            'layout': deck['layout'],
+            'items': items,
+        })
+    return decks
+
+def page_slices(deck):
+    per_page = deck['layout']['cards_per_page']
+    items = deck['items']
+    return [items[i:i + per_page] for i in range(0, len(items), per_page)]
+
+def preview_decks(decks, preview_file, image_cache, preview_dpi=PREVIEW_DPI, columns=4):
+    """
+    Render every page of every deck at preview_dpi into one PNG contact
+    sheet. Uses each deck's own sheet plan scaled down, fast image decoding
+    and no tile cache, so it takes a fraction of a second.
+    """
+    start = time.perf_counter()
+    pages = []
+    for deck in decks:
+        scale = preview_scale(deck['config'].get('dpi', 72), preview_dpi)
+        layout = scale_layout(deck['layout'], scale)
+        fonts = load_card_fonts(layout['font_scale'])
+        for page_items in page_slices(deck):
+            page_img, _ = render_page(page_items, deck['config'], layout, fonts, image_cache)
+            pages.append(page_img)
+    
+    sheet = contact_sheet(pages, columns)
+    if sheet is None:
+        print("❌ Error: Nothing to preview")
+        return False
+    Path(preview_file).parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(preview_file)
+    print(f"👁️  Preview: {preview_file} ({len(pages)} pages at {preview_dpi} dpi, "
+          f"{time.perf_counter() - start:.2f}s)")
+    return True
+
+def render_decks(decks, image_cache, jobs=1, tile_cache=None):
+    """
+    Yield (deck_index, encoded_page, render_seconds, rebuilt_cards) for
+    every page of every deck, in deck order then page order.
+    
+    With jobs > 1 pages are rendered and encoded in one process pool
+    shared by all decks: each task is the contiguous slice of items for
+    one page, so independent decks render concurrently while results
+    still come back in order, identical to a sequential run.
+    """
+    tasks = [(d, page_items) for d, deck in enumerate(decks) for page_items in page_slices(deck)]
+    jobs = min(jobs, len(tasks))
+    
+    if jobs <= 1:
+        for d, page_items in tasks:
+            deck = decks[d]
+            start = time.perf_counter()
+            fonts = load_card_fonts(deck['layout']['font_scale'])
+            page_img, rebuilt = render_page(page_items, deck['config'], deck['layout'], fonts,
+                                            image_cache, tile_cache)
+            encoded = encode_card_page(page_img, deck['config'])
+            yield d, encoded, time.perf_counter() - start, rebuilt
+        return
+    
+    deck_settings = [(deck['config'], deck['layout']) for deck in decks]
+    cache_mb = image_cache.max_bytes / (1024 * 1024)
+    worker_stats = {}
+    tile_dir = str(tile_cache.cache_dir) if tile_cache else None
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(deck_settings, cache_mb, tile_dir)) as pool:
+        for d, encoded, seconds, rebuilt, (pid, hits, misses) in pool.map(_render_page_task, tasks):
+            worker_stats[pid] = (hits, misses)
+            yield d, encoded, seconds, rebuilt
+    
+    image_cache.hits += sum(h for h, _ in worker_stats.values())
+    image_cache.misses += sum(m for _, m in worker_stats.values())
+
+def build_decks(decks, image_cache, jobs=1, tile_cache=None):
+    """
+    Render decks into their output PDFs, streaming pages as they arrive.
+    Returns one result dict per deck (pages, cards, timings, rebuilt cards).
+    """
+    started = time.perf_counter()
+    results = [{'name': deck['name'], 'output': deck['output'], 'cards': len(deck['items']),
+                'pages': 0, 'render_seconds': 0.0, 'finished_at': None, 'rebuilt': [],
+                'layout': deck['layout']}
+               for deck in decks]
+    remaining = [len(page_slices(deck)) for deck in decks]
+    writers = {}
+    
+    try:
+        for d, encoded, seconds, rebuilt in render_decks(decks, image_cache, jobs, tile_cache):
+            deck = decks[d]
+            if d not in writers:
+                writers[d] = PDFPageWriter(deck['output'], resolution=deck['config'].get('dpi', 72))
+            writers[d].add_encoded(encoded)
+            results[d]['render_seconds'] += seconds
+            results[d]['rebuilt'].extend(rebuilt)
+            remaining[d] -= 1
+            if remaining[d] == 0:
+                results[d]['pages'] = writers.pop(d).close()
+                results[d]['finished_at'] = time.perf_counter() - started
+                print(f"✅ Generated: {deck['output']} ({results[d]['pages']} pages, {len(deck['items'])} cards)")
+                print_packing_report(results[d])
+                if tile_cache:
+                    print_rebuild_report(results[d])
+    finally:
+        for writer in writers.values():
+            writer.abort()
+    
+    return results
+
+def print_packing_report(result):
+    layout = result['layout']
+    baseline = layout['baseline_per_page']
+    if baseline == layout['cards_per_page']:
+        print(f"   📐 {layout['cards_per_page']} per page ({layout['plan']})")
+        return
+    if baseline:
+        baseline_pages = -(-result['cards'] // baseline)
+        saved = baseline_pages - result['pages']
+        sheets = f"{result['pages']} sheet{'s' if result['pages'] != 1 else ''}"
+        if saved > 0:
+            print(f"   📐 {layout['cards_per_page']} per page ({layout['plan']}) vs {baseline} on the fixed grid: "
+                  f"{sheets} instead of {baseline_pages} ({saved} saved)")
+        else:
+            print(f"   📐 {layout['cards_per_page']} per page ({layout['plan']}) vs {baseline} on the fixed grid: "
+                  f"{sheets} either way")
+    else:
+        print(f"   📐 {layout['cards_per_page']} per page ({layout['plan']}); cards don't fit the fixed grid")
+
+def print_rebuild_report(result):
+    rebuilt = result['rebuilt']
+    reused = result['cards'] - len(rebuilt)
+    if not rebuilt:
+        print(f"   ♻️  All {result['cards']} cards from tile cache")
+        return
+    if not reused:
+        print(f"   🔨 Rendered all {result['cards']} cards (nothing cached yet)")
+        return
+    print(f"   🔨 Rebuilt {len(rebuilt)} of {result['cards']} cards ({reused} from tile cache): "
+          + ', '.join(rebuilt))
+
+def print_deck_summary(results, elapsed):
+    print(f"\n{'='*60}")
+    print(f"📊 Deck summary")
+    print(f"{'='*60}")
+    for r in results:
+        print(f"  {r['name']:<30} {r['pages']:>4} pages {r['cards']:>5} cards "
+              f"{r['render_seconds']:>7.2f}s render, done at {r['finished_at']:.2f}s")
+    total_pages = sum(r['pages'] for r in results)
+    print(f"{'='*60}")
+    print(f"  {len(results)} decks, {total_pages} pages in {elapsed:.2f}s")
+    print(f"{'='*60}\n")
+
+def load_manifest(manifest_file, overrides=None):
+    """
+    Build decks from a manifest file
+    
+    Manifest format:
+    {
+        "defaults": {"dpi": 150},
+        "decks": [
+            {"config": "configs/fact_cards.json", "output": "to_print/fact_cards.pdf"},
+            {"name": "rumors", "output": "to_print/rumor_cards.pdf",
+             "title": "RUMOR", "data_source": "data/rumors.json", "data_key": "rumors"}
+        ]
+    }
+    
+    Each deck's config is defaults, then its "config" file, then any
+    other keys given inline, then overrides (from the command line).
+    Decks with "group_by" expand into one deck per group.
+    """
+    manifest = load_config(manifest_file)
+    defaults = manifest.get('defaults', {})
+    
+    decks = []
+    for entry in manifest.get('decks', []):
+        config = dict(defaults)
+        if entry.get('config'):
+            config.update(load_config(entry['config']))
+        config.update({k: v for k, v in entry.items() if k not in ('config', 'output', 'name')})
+        config.update(overrides or {})
+        decks.extend(split_deck(make_deck(config, entry['output'], entry.get('name'))))
+    return decks
+
+def create_decks_from_manifest(manifest_file, image_cache=None, jobs=1, tile_cache=None,
+                               preview_file=None, preview_dpi=PREVIEW_DPI, refine=False, page_mode=None):
+    """
+    Build every deck in a manifest in one process, sharing fonts, images and data.
+    With preview_file, a contact sheet is written first; the PDFs follow
+    only when refine is true, rendered from the same sheet plans.
+    """
+    started = time.perf_counter()
+    if image_cache is None:
+        image_cache = shared_image_cache()
+    
+    decks = load_manifest(manifest_file, {'page_mode': page_mode} if page_mode else None)
+    empty = [deck['name'] for deck in decks if not deck['items']]
+    for name in empty:
+        print(f"❌ Error: No items found for {name}")
+    decks = [deck for deck in decks if deck['items']]
+    
+    if preview_file:
+        if not preview_decks(decks, preview_file, image_cache, preview_dpi):
+            return False
+        if not refine:
+            return not empty
+    
+    results = build_decks(decks, image_cache, jobs, tile_cache)
+    print_deck_summary(results, time.perf_counter() - started)
+    print(image_cache.summary())
+    return not empty
+
+def create_card_pdf(config_file, output_file, image_cache=None, jobs=1, group_by=None, combined=None,
+                    tile_cache=None, preview_file=None, preview_dpi=PREVIEW_DPI, page_mode=None):
     """
     Create PDF from config file
     
@@ -59,164 +633,110 @@ def create_card_pdf(config_file, output_file):
         },
         "image_path_template": "fact_images/fact_{id:02d}.png",
         "qr_path_template": "qr_codes/character_{id}.png",
-        "photo_path_template": "assets/{id}.png"
+        "qr_url_template": "{base_url}/character/{id}.html",
+        "qr_render": "matrix",
+        "photo_path_template": "assets/{id}.png",
+        "max_text_size": 14,
+        "min_text_size": 8,
+        "pdf_compression": "jpeg",
+        "jpeg_quality": 90,
+        "image_cache_mb": 256,
+        "group_by": "character",
+        "group_output": "to_print/facts_{group}.pdf",
+        "group_combined": false,
+        "packing": "auto",
+        "gutter": 0.0,
+        "crop_marks": false,
+        "crop_mark_length": 0.125,
+        "page_mode": "RGB"
     }
-    """
-    with open(config_file, 'r') as f:
-        config = json.load(f)
     
-    # Extract config
-    card_w = config.get('card_size', {}).get('width', 2.5)
-    card_h = config.get('card_size', {}).get('height', 3.5)
-    page_w = config.get('page_size', {}).get('width', 8.5)
-    page_h = config.get('page_size', {}).get('height', 11.0)
-    margin = config.get('margin', 0.5)
-    dpi = config.get('dpi', 72)
-    title_text = config.get('title', 'CARD')
+    page_mode "L" or "1" draws grayscale pages and stores them as 8-bit
+    gray or 1-bit CCITT; "auto" keeps RGB drawing but stores each page in
+    the smallest mode that loses nothing.
     
-    # Convert to pixels
-    page_w_px = int(page_w * dpi)
-    page_h_px = int(page_h * dpi)
-    margin_px = int(margin * dpi)
-    card_w_px = int(card_w * dpi)
-    card_h_px = int(card_h * dpi)
-    
-    # Calculate grid
-    usable_w = page_w_px - (2 * margin_px)
-    usable_h = page_h_px - (2 * margin_px)
-    cols = int(usable_w / card_w_px)
-    rows = int(usable_h / card_h_px)
-    cards_per_page = cols * rows
-    
-    # Load data
-    data_source = config.get('data_source')
-    data_key = config.get('data_key', 'rumors')
+    Cards are packed to fit the most per sheet, rotating some or all of
+    them when that helps ("packing": "grid" keeps the plain upright grid).
     
-    if data_source:
-        with open(data_source, 'r') as f:
-            data = json.load(f)
-        items = data.get(data_key, [])
-    else:
-        items = config.get('items', [])
+    With group_by set, one PDF is written per distinct item value (named
+    by group_output, or <output>_<group>.pdf), plus output_file itself
+    when group_combined is true; groups render in parallel.
+    
+    Decoded images are shared through image_cache (the process-wide
+    cache by default), so cards reusing a path skip decode and resample.
+    Pages are rendered by `jobs` worker processes (1 = in-process).
+    With a tile_cache, each card is rendered once per distinct content and
+    pages are composited from cached tiles.
+    
+    With preview_file, a low-resolution PNG contact sheet is written first
+    from the same sheet plan; output_file=None stops after the preview.
+    """
+    started = time.perf_counter()
+    config = load_config(config_file)
+    if group_by is not None:
+        config['group_by'] = group_by
+    if combined is not None:
+        config['group_combined'] = combined
+    if page_mode is not None:
+        config['page_mode'] = page_mode
     
-    if not items:
+    if image_cache is None:
+        image_cache = shared_image_cache(config.get('image_cache_mb'))
+    
+    deck = make_deck(config, output_file or preview_file)
+    if not deck['items']:
         print(f"❌ Error: No items found")
         return False
     
-    # Create pages
-    pages = []
-    card_index = 0
-    num_pages = math.ceil(len(items) / cards_per_page)
-    
-    title_font = load_font(32)
-    text_font = load_font(14)
-    small_font = load_font(10)
-    
-    for page_num in range(num_pages):
-        page_img = Image.new('RGB', (page_w_px, page_h_px), color='white')
-        draw = ImageDraw.Draw(page_img)
-        
-        for row in range(rows):
-            if card_index >= len(items):
-                break
-            for col in range(cols):
-                if card_index >= len(items):
-                    break
-                
-                x = margin_px + (col * card_w_px)
-                y = margin_px + (row * card_h_px)
-                center_x = x + (card_w_px // 2)
-                
-                item = items[card_index]
-                fields = config.get('fields', {})
-                
-                # Draw border
-                draw_ornate_border(draw, x, y, card_w_px, card_h_px)
-                
-                # Draw title
-                title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
-                title_w = title_bbox[2] - title_bbox[0]
-                draw.text((center_x - title_w//2, y + 10), title_text, 
-                         fill='#1a1a1a', font=title_font)
-                
-                current_y = y + 50
-                
-                # Load and paste image if template provided
-                img_template = config.get('image_path_template')
-                if img_template and 'id' in item:
-                    img_path = img_template.format(**item)
-                    if Path(img_path).exists():
-                        img = Image.open(img_path)
-                        img.thumbnail((card_w_px - 20, int(card_h_px * 0.4)), Image.Resampling.LANCZOS)
-                        img_x = center_x - (img.width // 2)
-                        page_img.paste(img, (img_x, current_y))
-                        current_y += img.height + 10
-                
-                # Load and paste photo if template provided
-                photo_template = config.get('photo_path_template')
-                if photo_template and 'id' in item:
-                    photo_path = photo_template.format(**item)
-                    if Path(photo_path).exists():
-                        photo = Image.open(photo_path)
-                        photo.thumbnail((card_w_px - 40, int(card_h_px * 0.25)), Image.Resampling.LANCZOS)
-                        photo_x = center_x - (photo.width // 2)
-                        page_img.paste(photo, (photo_x, current_y))
-                        current_y += photo.height + 8
-                
-                # Load and paste QR code if template provided
-                qr_template = config.get('qr_path_template')
-                if qr_template and 'id' in item:
-                    qr_path = qr_template.format(**item)
-                    if Path(qr_path).exists():
-                        qr = Image.open(qr_path)
-                        qr_size = int(card_w_px * 0.6)
-                        qr.thumbnail((qr_size, qr_size), Image.Resampling.LANCZOS)
-                        qr_x = center_x - (qr.width // 2)
-                        page_img.paste(qr, (qr_x, current_y))
-                        current_y += qr.height + 8
-                
-                # Draw text content
-                text_field = fields.get('text') or fields.get('description')
-                if text_field and text_field in item:
-                    text = item[text_field]
-                    lines = textwrap.wrap(text, width=20)
-                    max_lines = int((y + card_h_px - current_y - 30) / 16)
-                    lines = lines[:max_lines]
-                    
-                    for line in lines:
-                        line_bbox = draw.textbbox((0, 0), line, font=text_font)
-                        line_w = line_bbox[2] - line_bbox[0]
-                        draw.text((center_x - line_w//2, current_y), line,
-                                 fill='#1a1a1a', font=text_font)
-                        current_y += 16
-                
-                # Draw possession/attribution
-                possession_field = fields.get('possession')
-                if possession_field and possession_field in item:
-                    pos_text = f"— {item[possession_field].upper()} —"
-                    pos_bbox = draw.textbbox((0, 0), pos_text, font=small_font)
-                    pos_w = pos_bbox[2] - pos_bbox[0]
-                    draw.text((center_x - pos_w//2, y + card_h_px - 24),
-                             pos_text, fill='#1a1a1a', font=small_font)
-                
-                card_index += 1
-        
-        pages.append(page_img)
-    
-    # Save PDF
-    if pages:
-        pages[0].save(output_file, save_all=True, append_images=pages[1:])
-        print(f"✅ Generated: {output_file} ({len(pages)} pages, {len(items)} cards)")
-        return True
-    return False
+    decks = split_deck(deck)
+    if preview_file:
+        if not preview_decks(decks, preview_file, image_cache, preview_dpi):
+            return False
+        if not output_file:
+            return True
+    
+    results = build_decks(decks, image_cache, jobs, tile_cache)
+    if len(decks) > 1:
+        print_deck_summary(results, time.perf_counter() - started)
+    print(image_cache.summary())
+    return all(r['pages'] > 0 for r in results)
 
 def main():
     parser = argparse.ArgumentParser(description="Generate card PDF from config")
-    parser.add_argument("--config", required=True, help="JSON config file")
-    parser.add_argument("--output", required=True, help="Output PDF filename")
+    parser.add_argument("--config", help="JSON config file")
+    parser.add_argument("--output", help="Output PDF filename")
+    parser.add_argument("--manifest", help="JSON manifest of decks to build in one run")
+    parser.add_argument("--group-by", help="Item field to split into one PDF per value (e.g. character)")
+    parser.add_argument("--combined", action="store_true", help="With --group-by, also write the full deck to --output")
+    parser.add_argument("--tile-cache", default=str(DEFAULT_TILE_CACHE_DIR),
+                        help=f"Directory for cached card renders (default: {DEFAULT_TILE_CACHE_DIR})")
+    parser.add_argument("--no-tile-cache", action="store_true", help="Render every card from scratch")
+    parser.add_argument("--cache-mb", type=float, help="Decoded image cache size in MB (default: 256)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for page rendering (default: CPU count, 1 = no pool)")
+    parser.add_argument("--page-mode", choices=PAGE_MODES,
+                        help="Page colour mode: RGB, L (gray), 1 (black/white) or auto (default: config or RGB)")
+    parser.add_argument("--preview", metavar="PNG", help="Write a low-resolution contact sheet of every page")
+    parser.add_argument("--preview-dpi", type=int, default=PREVIEW_DPI,
+                        help=f"Resolution of the preview (default: {PREVIEW_DPI})")
+    parser.add_argument("--refine", action="store_true",
+                        help="After --preview, also render the full-resolution PDFs from the same layout")
     args = parser.parse_args()
     
-    create_card_pdf(args.config, args.output)
+    image_cache = shared_image_cache(args.cache_mb) if args.cache_mb is not None else None
+    tile_cache = None if args.no_tile_cache else TileCache(args.tile_cache)
+    if args.manifest:
+        create_decks_from_manifest(args.manifest, image_cache, jobs=args.jobs, tile_cache=tile_cache,
+                                   preview_file=args.preview, preview_dpi=args.preview_dpi,
+                                   refine=args.refine, page_mode=args.page_mode)
+    elif args.config and (args.output or args.preview):
+        output = args.output if (args.refine or not args.preview) else None
+        create_card_pdf(args.config, output, image_cache, jobs=args.jobs,
+                        group_by=args.group_by, combined=args.combined or None,
+                        tile_cache=tile_cache, preview_file=args.preview, preview_dpi=args.preview_dpi,
+                        page_mode=args.page_mode)
+    else:
+        parser.error("Either --manifest or (--config and --output/--preview) required")
 
 if __name__ == "__main__":
     main()
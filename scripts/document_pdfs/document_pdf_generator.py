@@ -5,13 +5,28 @@ Creates PDFs from images with optional QR code overlays
 Supports full page, half page, and grid layouts
 """
 
+import os
+import sys
 import json
+import time
 import argparse
-import math
 from pathlib import Path
 from PIL import Image, ImageDraw
 
-def create_document_pdf(config_file, output_file):
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.contact_sheet import PREVIEW_DPI, contact_sheet, preview_scale
+from shared.image_cache import read_image_size, shared_image_cache, thumbnail_size
+from shared.pdf_writer import PDFPageWriter
+from shared.prefetch import prefetch
+from shared.qr import qr_fit_size, qr_image, qr_matrix, qr_url_for, qrcode_available
+
+# Rough compressed bits per pixel of photo and of blank page, for the
+# plan's size estimate (measured on the game's artwork at quality 90)
+BITS_PER_PIXEL = {'jpeg': (2.0, 0.13), 'flate': (14.0, 0.01)}
+PAGE_OVERHEAD_BYTES = 512
+
+def create_document_pdf(config_file, output_file, image_cache=None, preview_file=None,
+                        preview_dpi=PREVIEW_DPI, plan_only=False, jobs=1):
     """
     Create PDF from config file
     
@@ -26,12 +41,78 @@ def create_document_pdf(config_file, output_file):
         "image_dir": "assets/clue_images_documents",
         "qr_dir": "qr_codes",
         "qr_overlay": true,
-        "qr_size_ratio": 0.33
+        "qr_size_ratio": 0.33,
+        "qr_render": "matrix",
+        "pdf_compression": "jpeg",
+        "image_cache_mb": 256
     }
+    
+    The layout is planned first from image headers only (see
+    plan_document); plan_only=True prints the plan and stops, failing
+    if any file is missing.
+    
+    With preview_file, a low-resolution PNG contact sheet is written first
+    (same page geometry, scaled down); output_file=None stops there.
+    
+    Images are decoded and resampled by `jobs` threads running ahead of
+    page assembly and encoding (1 = all on the main thread).
     """
     with open(config_file, 'r') as f:
         config = json.load(f)
     
+    dpi = config.get('dpi', 72)
+    
+    # Load items
+    items = config.get('items', [])
+    if not items:
+        print("❌ Error: No items found")
+        return False
+    
+    plan = plan_document(config, items)
+    if plan_only:
+        print_plan_report(plan, items)
+        return bool(plan['pages']) and not plan['missing']
+    for path in plan['missing']:
+        print(f"  ⚠️  Image not found or unreadable, skipped: {path}")
+    
+    if image_cache is None:
+        image_cache = shared_image_cache(config.get('image_cache_mb'))
+    
+    if preview_file:
+        if not preview_document(plan, preview_file, image_cache, preview_dpi):
+            return False
+        if not output_file:
+            return True
+    
+    # Stream each page into the PDF as soon as it is composed
+    with PDFPageWriter(output_file, resolution=dpi,
+                       compression=config.get('pdf_compression', 'jpeg'),
+                       quality=config.get('jpeg_quality', 90)) as writer:
+        for page_img in render_document_pages(plan, image_cache, jobs=jobs):
+            writer.add_page(page_img)
+            page_img.close()
+    
+    if writer.page_count:
+        print(f"✅ Generated: {output_file} ({writer.page_count} pages, {len(items)} items)")
+        print(image_cache.summary())
+        return True
+    return False
+
+def plan_document(config, items):
+    """
+    Work out every page of the document from image headers alone.
+    
+    Returns a dict with the page size in pixels, 'pages' (each a list of
+    placements), 'missing' files and 'estimated_bytes'. A placement is
+    {'image', 'box', 'size', 'pos', 'qr'}: the image is fitted into box
+    (Image.thumbnail), ends up at size and is pasted at pos; 'qr' is
+    None or {'path', 'url', 'box', 'size', 'pos'} with pos relative to the
+    image. With a url the QR is drawn from its module matrix at a whole
+    number of pixels per module (item "qr_url", or derived from a qr_codes/
+    file name), otherwise the PNG at path is fitted into box.
+    Missing images leave their slot empty, as before; in the full layout
+    they produce no page.
+    """
     page_w = config.get('page_size', {}).get('width', 8.5)
     page_h = config.get('page_size', {}).get('height', 11.0)
     dpi = config.get('dpi', 72)
@@ -40,134 +121,218 @@ def create_document_pdf(config_file, output_file):
     page_w_px = int(page_w * dpi)
     page_h_px = int(page_h * dpi)
     
-    # Load items
-    items = config.get('items', [])
-    if not items:
-        print("❌ Error: No items found")
-        return False
+    sizes = {}
+    missing = []
     
-    pages = []
+    def fitted(path, box):
+        if path not in sizes:
+            sizes[path] = read_image_size(path)
+            if sizes[path] is None:
+                missing.append(path)
+        return thumbnail_size(sizes[path], box) if sizes[path] else None
+    
+    def qr_url(item):
+        if config.get('qr_render', 'matrix') != 'matrix' or not qrcode_available():
+            return None
+        if item.get('qr_url'):
+            return item['qr_url']
+        if item.get('qr') and Path(item['qr']).is_file():
+            return qr_url_for(item['qr'])
+        return None
+    
+    def qr_overlay(item, img_size):
+        # QR codes are centred on the image, sized from its shorter side
+        if not config.get('qr_overlay') or ('qr' not in item and 'qr_url' not in item):
+            return None
+        qr_size = int(min(img_size) * config.get('qr_size_ratio', 0.33))
+        box = (qr_size, qr_size)
+        url = qr_url(item)
+        if url:
+            size = (qr_fit_size(qr_matrix(url), qr_size),) * 2
+        else:
+            size = fitted(item.get('qr', ''), box)
+        if size is None:
+            return None
+        return {'path': item.get('qr'), 'url': url, 'box': box, 'size': size,
+                'pos': ((img_size[0] - size[0]) // 2, (img_size[1] - size[1]) // 2)}
     
+    pages = []
     if layout == 'grid':
         # Grid layout (e.g., 2 photos per page)
         cols = config.get('grid_cols', 1)
         rows = config.get('grid_rows', 2)
         frame_w = config.get('frame_width', 4.0)
         frame_h = config.get('frame_height', 6.0)
-        frame_w_px = int(frame_w * dpi)
-        frame_h_px = int(frame_h * dpi)
+        box = (int(frame_w * dpi), int(frame_h * dpi))
         margin = int(0.5 * dpi)
         
         items_per_page = cols * rows
-        num_pages = math.ceil(len(items) / items_per_page)
-        
-        for page_num in range(num_pages):
-            page_img = Image.new('RGB', (page_w_px, page_h_px), color='white')
-            
-            for i in range(items_per_page):
-                idx = page_num * items_per_page + i
-                if idx >= len(items):
-                    break
-                
-                item = items[idx]
-                image_path = Path(item.get('image', ''))
-                if not image_path.exists():
+        for start in range(0, len(items), items_per_page):
+            page = []
+            for i, item in enumerate(items[start:start + items_per_page]):
+                size = fitted(item.get('image', ''), box)
+                if size is None:
                     continue
-                
-                img = Image.open(image_path)
-                img.thumbnail((frame_w_px, frame_h_px), Image.Resampling.LANCZOS)
-                
                 col = i % cols
                 row = i // cols
-                x = margin + col * (frame_w_px + margin)
-                y = margin + row * (frame_h_px + margin)
-                
-                page_img.paste(img, (x, y))
-            
-            pages.append(page_img)
+                pos = (margin + col * (box[0] + margin), margin + row * (box[1] + margin))
+                page.append({'image': item.get('image', ''), 'box': box, 'size': size,
+                             'pos': pos, 'qr': None})
+            pages.append(page)
     
     elif layout == 'half':
         # Half page layout
         items_per_page = 2
-        num_pages = math.ceil(len(items) / items_per_page)
         half_h = page_h_px // 2
         margin = int(0.5 * dpi)
+        box = (page_w_px - 2*margin, half_h - 2*margin)
         
-        for page_num in range(num_pages):
-            page_img = Image.new('RGB', (page_w_px, page_h_px), color='white')
-            
-            for i in range(items_per_page):
-                idx = page_num * items_per_page + i
-                if idx >= len(items):
-                    break
-                
-                item = items[idx]
-                image_path = Path(item.get('image', ''))
-                if not image_path.exists():
+        for start in range(0, len(items), items_per_page):
+            page = []
+            for i, item in enumerate(items[start:start + items_per_page]):
+                size = fitted(item.get('image', ''), box)
+                if size is None:
                     continue
-                
-                img = Image.open(image_path)
-                img.thumbnail((page_w_px - 2*margin, half_h - 2*margin), Image.Resampling.LANCZOS)
-                
-                y = i * half_h + margin
-                x = (page_w_px - img.width) // 2
-                
-                # Add QR overlay if configured
-                if config.get('qr_overlay') and 'qr' in item:
-                    qr_path = Path(item['qr'])
-                    if qr_path.exists():
-                        qr = Image.open(qr_path)
-                        qr_size = int(min(img.width, img.height) * config.get('qr_size_ratio', 0.33))
-                        qr.thumbnail((qr_size, qr_size), Image.Resampling.LANCZOS)
-                        qr_x = (img.width - qr.width) // 2
-                        qr_y = (img.height - qr.height) // 2
-                        img.paste(qr, (qr_x, qr_y))
-                
-                page_img.paste(img, (x, y))
-            
-            pages.append(page_img)
+                pos = ((page_w_px - size[0]) // 2, i * half_h + margin)
+                page.append({'image': item.get('image', ''), 'box': box, 'size': size,
+                             'pos': pos, 'qr': qr_overlay(item, size)})
+            pages.append(page)
     
     else:  # full page
+        box = (page_w_px, page_h_px)
         for item in items:
-            image_path = Path(item.get('image', ''))
-            if not image_path.exists():
+            size = fitted(item.get('image', ''), box)
+            if size is None:
+                continue
+            pos = ((page_w_px - size[0]) // 2, (page_h_px - size[1]) // 2)
+            pages.append([{'image': item.get('image', ''), 'box': box, 'size': size,
+                           'pos': pos, 'qr': qr_overlay(item, size)}])
+    
+    photo_bits, blank_bits = BITS_PER_PIXEL.get(config.get('pdf_compression', 'jpeg'), BITS_PER_PIXEL['flate'])
+    placed_px = sum(p['size'][0] * p['size'][1] for page in pages for p in page)
+    blank_px = len(pages) * page_w_px * page_h_px - placed_px
+    return {
+        'layout': layout,
+        'dpi': dpi,
+        'page_size': (page_w_px, page_h_px),
+        'pages': pages,
+        'missing': missing,
+        'estimated_bytes': int((placed_px * photo_bits + blank_px * blank_bits) / 8)
+                           + PAGE_OVERHEAD_BYTES * len(pages),
+    }
+
+def print_plan_report(plan, items):
+    placed = sum(len(page) for page in plan['pages'])
+    print(f"\n{'='*60}")
+    print(f"📋 Document plan ({plan['layout']} layout, {plan['dpi']} dpi)")
+    print(f"{'='*60}")
+    print(f"  Pages:          {len(plan['pages'])}")
+    print(f"  Images placed:  {placed} of {len(items)} items")
+    print(f"  Estimated size: {plan['estimated_bytes'] / (1024 * 1024):.1f} MB")
+    if plan['missing']:
+        print(f"  ❌ Missing or unreadable files ({len(plan['missing'])}):")
+        for path in plan['missing']:
+            print(f"     - {path or '(no image given)'}")
+    else:
+        print(f"  ✅ All files found")
+    print(f"{'='*60}\n")
+
+def preview_document(plan, preview_file, image_cache, preview_dpi=PREVIEW_DPI):
+    """Render every page at preview_dpi into one PNG contact sheet"""
+    start = time.perf_counter()
+    scale = preview_scale(plan['dpi'], preview_dpi)
+    pages = list(render_document_pages(plan, image_cache, scale))
+    sheet = contact_sheet(pages)
+    if sheet is None:
+        print("❌ Error: Nothing to preview")
+        return False
+    Path(preview_file).parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(preview_file)
+    print(f"👁️  Preview: {preview_file} ({len(pages)} pages at {preview_dpi} dpi, "
+          f"{time.perf_counter() - start:.2f}s)")
+    return True
+
+def render_document_pages(plan, image_cache, scale=1.0, jobs=1):
+    """
+    Yield composed page images one at a time, following a plan from
+    plan_document.
+    
+    Every image the plan needs is known up front, so with jobs > 1 they
+    are decoded and fitted on worker threads (through image_cache) a
+    bounded distance ahead of the page being assembled.
+    
+    With scale < 1 (previews) every box and position is scaled from the
+    plan and images are decoded the fast way, so a preview places
+    everything exactly where the full render does.
+    """
+    fast = scale < 1
+    
+    def px(value):
+        return int(value * scale)
+    
+    page_w_px, page_h_px = (px(v) for v in plan['page_size'])
+    
+    # Images in the order the pages below consume them
+    needed = []
+    for page in plan['pages']:
+        for placement in page:
+            needed.append((placement['image'], None, tuple(px(v) for v in placement['box'])))
+            qr_plan = placement['qr']
+            if qr_plan:
+                needed.append((qr_plan['path'], qr_plan['url'], tuple(px(v) for v in qr_plan['box'])))
+    
+    def load(request):
+        path, url, box = request
+        if url:
+            return qr_image(url, box[0])
+        return image_cache.get(path, box, fast=fast)
+    
+    images = prefetch(load, needed, jobs)
+    
+    for page in plan['pages']:
+        page_img = Image.new('RGB', (page_w_px, page_h_px), color='white')
+        
+        for placement in page:
+            img = next(images)
+            qr_plan = placement['qr']
+            qr = next(images) if qr_plan else None
+            if img is None:
                 continue
             
-            img = Image.open(image_path)
-            img.thumbnail((page_w_px, page_h_px), Image.Resampling.LANCZOS)
-            
-            page_img = Image.new('RGB', (page_w_px, page_h_px), color='white')
-            x = (page_w_px - img.width) // 2
-            y = (page_h_px - img.height) // 2
-            
-            # Add QR overlay if configured
-            if config.get('qr_overlay') and 'qr' in item:
-                qr_path = Path(item.get('qr', ''))
-                if qr_path.exists():
-                    qr = Image.open(qr_path)
-                    qr_size = int(min(img.width, img.height) * config.get('qr_size_ratio', 0.33))
-                    qr.thumbnail((qr_size, qr_size), Image.Resampling.LANCZOS)
-                    qr_x = x + (img.width - qr.width) // 2
-                    qr_y = y + (img.height - qr.height) // 2
-                    img.paste(qr, (qr_x - x, qr_y - y))
+            # Add QR overlay if planned
+            if qr is not None:
+                img = img.copy()  # cached images are shared
+                qr_x, qr_y = (px(v) for v in qr_plan['pos'])
+                img.paste(qr, (qr_x, qr_y))
             
+            x, y = (px(v) for v in placement['pos'])
             page_img.paste(img, (x, y))
-            pages.append(page_img)
-    
-    # Save PDF
-    if pages:
-        pages[0].save(output_file, save_all=True, append_images=pages[1:])
-        print(f"✅ Generated: {output_file} ({len(pages)} pages, {len(items)} items)")
-        return True
-    return False
+        
+        yield page_img
 
 def main():
     parser = argparse.ArgumentParser(description="Generate document/photo PDF from config")
     parser.add_argument("--config", required=True, help="JSON config file")
-    parser.add_argument("--output", required=True, help="Output PDF filename")
+    parser.add_argument("--output", help="Output PDF filename")
+    parser.add_argument("--cache-mb", type=float, help="Decoded image cache size in MB (default: 256)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Threads decoding images ahead of page assembly (default: CPU count, 1 = none)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Dry run: report pages, missing files and estimated size without decoding images")
+    parser.add_argument("--preview", metavar="PNG", help="Write a low-resolution contact sheet of every page")
+    parser.add_argument("--preview-dpi", type=int, default=PREVIEW_DPI,
+                        help=f"Resolution of the preview (default: {PREVIEW_DPI})")
+    parser.add_argument("--refine", action="store_true",
+                        help="After --preview, also render the full-resolution PDF")
     args = parser.parse_args()
+    if not args.output and not args.preview and not args.plan:
+        parser.error("--output, --preview or --plan required")
     
-    create_document_pdf(args.config, args.output)
+    image_cache = shared_image_cache(args.cache_mb) if args.cache_mb is not None else None
+    output = args.output if (args.refine or not args.preview) else None
+    success = create_document_pdf(args.config, output, image_cache, args.preview, args.preview_dpi,
+                                  plan_only=args.plan, jobs=args.jobs)
+    sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
     main()
@@ -2,12 +2,16 @@
 """
 Unified Image Generator using Gemini API
 Generates images from prompts and saves to assets directory
-Supports single images or batch generation from JSON
+Supports single images or batch generation from JSON, run concurrently
+with a rate limit and retries (see shared/image_batch.py); every result is
+cached by prompt, model and parameters and re-used until --force, and gets
+web-optimized variants (see optimize_assets.py)
 """
 
 import os
 import sys
 import json
+import time
 import argparse
 from pathlib import Path
 
@@ -17,91 +21,226 @@ try:
 except ImportError:
     pass
 
-try:
-    import google.generativeai as genai
-    HAS_GENAI = True
-except ImportError:
-    HAS_GENAI = False
-    print("Error: google-generativeai not installed. Run: pip install google-generativeai")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def generate_image(prompt, output_path, model_name='gemini-2.5-flash-image'):
-    """Generate a single image using Gemini API"""
-    if not HAS_GENAI:
-        print("❌ Error: google-generativeai not installed")
-        return None
+from shared.image_batch import BACKENDS, DEFAULT_MODEL, generate_with_retry, run_batch
+from shared.generation_cache import DEFAULT_MAX_MB, GenerationCache, generation_key
+from shared.batch_journal import BatchJournal, journal_path
+from shared.asset_pipeline import optimize_images, print_optimize_report
+
+# Batch defaults, overridable in the batch JSON and on the command line
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_MINUTE = 10
+DEFAULT_RETRIES = 3
+
+def make_backend(name='gemini', stub_latency=1.0, stub_failure_rate=0.0):
+    if name == 'stub':
+        return BACKENDS['stub'](latency=stub_latency, failure_rate=stub_failure_rate)
+    return BACKENDS[name]()
+
+def cache_result(cache, job, data):
+    cache.put(job['key'], data, prompt=job['prompt'], model=job['model'], params=job['params'])
+
+def generate_image(prompt, output_path, model_name=DEFAULT_MODEL, backend=None, params=None,
+                   cache=None, force=False):
+    """Generate a single image using Gemini API (or the given backend), unless it is cached"""
+    cache = cache or GenerationCache()
+    backend = backend or make_backend()
+    output_path = Path(output_path)
+    job = {'prompt': prompt, 'model': model_name, 'params': params,
+           'key': generation_key(prompt, model_name, params, backend.name)}
+    if not force and cache.get(job['key']):
+        cache.export(job['key'], output_path)
+        print(f"♻️  Cached: {output_path}")
+        return str(output_path)
     
-    api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key or api_key == 'your_gemini_api_key_here':
-        print("❌ Error: GEMINI_API_KEY not set in .env file")
+    problem = backend.available()
+    if problem:
+        print(f"❌ Error: {problem}")
         return None
     
-    genai.configure(api_key=api_key)
-    
-    # Ensure output directory exists
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    
     try:
         print(f"🎨 Generating: {output_path.name}")
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content([prompt])
-        
-        if response and response.parts:
-            for part in reversed(response.parts):
-                if hasattr(part, 'inline_data') and part.inline_data.data:
-                    with open(output_path, 'wb') as f:
-                        f.write(part.inline_data.data)
-                    print(f"✅ Saved: {output_path}")
-                    return str(output_path)
-        
-        print("❌ No image data in response")
-        return None
+        client = backend.create_client(model_name)
+        data, _ = generate_with_retry(backend, client, prompt, params, retries=DEFAULT_RETRIES)
+        cache_result(cache, job, data)
+        cache.export(job['key'], output_path)
+        print(f"✅ Saved: {output_path}")
+        return str(output_path)
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
 
-def generate_batch(batch_file):
-    """Generate multiple images from JSON batch file"""
+def load_batch(batch_file):
+    """Batch settings and one job per valid item ({'prompt', 'model', 'params', 'output'})"""
     with open(batch_file, 'r') as f:
         batch = json.load(f)
     
-    items = batch.get('items', [])
     output_dir = Path(batch.get('output_dir', 'assets'))
-    model_name = batch.get('model', 'gemini-2.5-flash-image')
+    model_name = batch.get('model', DEFAULT_MODEL)
+    params = batch.get('params')
     
-    print(f"📦 Generating {len(items)} images...\n")
-    
-    results = []
-    for item in items:
+    jobs = []
+    for item in batch.get('items', []):
         prompt = item.get('prompt')
         filename = item.get('filename') or item.get('output')
         if not prompt or not filename:
             print(f"⚠️  Skipping item: missing prompt or filename")
             continue
+        jobs.append({
+            'prompt': prompt,
+            'model': item.get('model', model_name),
+            'params': item.get('params', params),
+            'output': output_dir / filename,
+        })
+    return batch, jobs
+
+def generate_batch(batch_file, backend=None, concurrency=None, rate_per_minute=None, retries=None,
+                   cache=None, force=False, restart=False, stub_latency=1.0, stub_failure_rate=0.0):
+    """
+    Generate multiple images from JSON batch file, `concurrency` at a time
+    and no more than `rate_per_minute` requests (retries included).
+    Settings not given come from the batch file, then the defaults; a
+    rate of 0 means no limit. The stub settings apply when the batch file
+    picks the stub backend.
+    
+    Images already in the cache (same prompt, model and params) are copied
+    into place without a request unless force; items sharing a prompt are
+    generated once. Every finished item is appended to a journal next to
+    the batch file, and items it records as done (with the file unchanged)
+    are skipped, so an interrupted run resumes where it stopped.
+    """
+    batch, jobs = load_batch(batch_file)
+    backend = backend or make_backend(batch.get('backend', 'gemini'), stub_latency, stub_failure_rate)
+    for job in jobs:
+        job['key'] = generation_key(job['prompt'], job['model'], job['params'], backend.name)
+    cache = cache or GenerationCache()
+    journal = BatchJournal(journal_path(batch_file))
+    if force or restart:
+        journal.reset()
+    start = time.perf_counter()
+    
+    results = []
+    counts = {'earlier': 0, 'cached': 0, 'generated': 0, 'failed': 0, 'retried': 0}
+    pending = {}
+    for job in jobs:
+        if journal.completed(job['output'], job['key']):
+            results.append(str(job['output']))
+            counts['earlier'] += 1
+        elif not force and cache.get(job['key']):
+            cache.export(job['key'], job['output'])
+            journal.record(job['output'], job['key'], 'done')
+            results.append(str(job['output']))
+            counts['cached'] += 1
+            print(f"♻️  Cached: {job['output']}")
+        else:
+            pending.setdefault(job['key'], []).append(job)
+    if counts['earlier']:
+        print(f"⏭️  {counts['earlier']} items already done in {journal.path.name}")
+    
+    interrupted = False
+    if pending:
+        problem = backend.available()
+        if problem:
+            print(f"❌ Error: {problem}")
+            return results
         
-        output_path = output_dir / filename
-        result = generate_image(prompt, output_path, model_name)
-        if result:
-            results.append(result)
+        concurrency = concurrency or batch.get('concurrency', DEFAULT_CONCURRENCY)
+        if rate_per_minute is None:
+            rate_per_minute = batch.get('rate_per_minute', DEFAULT_RATE_PER_MINUTE)
+        retries = batch.get('retries', DEFAULT_RETRIES) if retries is None else retries
+        
+        limit = f"≤{rate_per_minute}/min" if rate_per_minute else "no rate limit"
+        print(f"📦 Generating {len(pending)} images "
+              f"({backend.name}, {concurrency} at a time, {limit})...\n")
+        
+        def handle(job, data):
+            cache_result(cache, job, data)
+            for same in pending[job['key']]:
+                cache.export(job['key'], same['output'])
+            return [str(same['output']) for same in pending[job['key']]]
+        
+        try:
+            for result in run_batch([group[0] for group in pending.values()], backend, handle,
+                                    workers=concurrency, rate=rate_per_minute / 60, retries=retries):
+                job = result['job']
+                counts['retried'] += result['attempts'] > 1
+                for same in pending[job['key']]:
+                    journal.record(same['output'], job['key'], result['status'], result['seconds'],
+                                   result['attempts'], result['error'])
+                if result['status'] == 'done':
+                    counts['generated'] += len(pending[job['key']])
+                    results.extend(result['output'])
+                    for output in result['output']:
+                        print(f"✅ Saved: {output} ({result['seconds']:.1f}s)")
+                else:
+                    counts['failed'] += len(pending[job['key']])
+                    print(f"❌ {job['output'].name}: {result['error']}")
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\n🛑 Interrupted - rerun the same command to resume")
     
-    print(f"\n✅ Generated {len(results)}/{len(items)} images")
+    print_batch_summary(counts, len(results), len(jobs), time.perf_counter() - start, journal.path)
+    removed, freed = cache.prune()
+    if removed:
+        print(f"🗑️  Pruned {removed} cached images ({freed / (1024 * 1024):.1f} MB) over the cache cap")
+    if interrupted:
+        sys.exit(130)
     return results
 
+def print_batch_summary(counts, done, total, elapsed, journal_file):
+    print(f"\n📊 {done}/{total} images done in {elapsed:.1f}s")
+    print(f"   Generated: {counts['generated']}, from cache: {counts['cached']}, "
+          f"done in an earlier run: {counts['earlier']}")
+    print(f"   Failed: {counts['failed']}, retried: {counts['retried']}")
+    print(f"   Journal: {journal_file}")
+
 def main():
     parser = argparse.ArgumentParser(description="Generate images using Gemini API")
     parser.add_argument("--prompt", help="Image generation prompt")
     parser.add_argument("--output", help="Output filename (e.g., assets/image.png)")
     parser.add_argument("--batch", help="JSON file with batch of images to generate")
-    parser.add_argument("--model", default="gemini-2.5-flash-image", help="Gemini model name")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Gemini model name")
+    parser.add_argument("--concurrency", type=int,
+                        help=f"Requests in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float,
+                        help=f"Max requests per minute, 0 for no limit (default: {DEFAULT_RATE_PER_MINUTE})")
+    parser.add_argument("--retries", type=int,
+                        help=f"Retries per image on transient errors (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Image backend (default: gemini)")
+    parser.add_argument("--force", action="store_true", help="Regenerate even images already in the cache")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the batch journal and go through every item again")
+    parser.add_argument("--no-optimize", action="store_true",
+                        help="Skip building WebP/AVIF web variants of the images written")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help=f"Cap on the generated image cache, least recently used pruned first "
+                             f"(default: {DEFAULT_MAX_MB})")
+    parser.add_argument("--stub-latency", type=float, default=1.0,
+                        help="Seconds per image for the stub backend (default: 1.0)")
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0,
+                        help="Fraction of stub requests that fail transiently (default: 0)")
     
     args = parser.parse_args()
     
+    cache = GenerationCache(max_mb=args.cache_max_mb)
+    backend = None
+    if args.backend:
+        backend = make_backend(args.backend, args.stub_latency, args.stub_failure_rate)
+    
     if args.batch:
-        generate_batch(args.batch)
+        outputs = generate_batch(args.batch, backend, args.concurrency, args.rate, args.retries,
+                                 cache=cache, force=args.force, restart=args.restart,
+                                 stub_latency=args.stub_latency, stub_failure_rate=args.stub_failure_rate)
     elif args.prompt and args.output:
-        generate_image(args.prompt, args.output, args.model)
+        output = generate_image(args.prompt, args.output, args.model, backend, cache=cache, force=args.force)
+        outputs = [output] if output else []
     else:
         parser.error("Either --batch or (--prompt and --output) required")
+    
+    # Web variants for everything written (unchanged images are skipped quickly)
+    if outputs and not args.no_optimize:
+        print_optimize_report(optimize_images(outputs, jobs=os.cpu_count() or 1))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Web Asset Optimizer
+Builds WebP/AVIF variants at responsive widths, plus blur placeholders,
+for every image in assets/ (or the given files and directories), in a
+process pool. Unchanged images are skipped; see shared/asset_pipeline.py.
+With --update-pages, the site's <img> tags get a srcset of the WebP
+variants, so phones download those instead of the originals.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.asset_pipeline import (DEFAULT_SETTINGS, MANIFEST_NAME, OPTIMIZED_DIR, SOURCE_EXTENSIONS,
+                                   available_formats, optimize_images, print_optimize_report)
+from shared.render_cache import load_manifest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+ASSETS_DIR = PROJECT_DIR / 'assets'
+# Generated or not served as-is, so never rewritten
+SKIP_PAGE_DIRS = {'_site', 'node_modules', 'src'}
+
+IMG_TAG = re.compile(r'<img\b[^>]*>')
+SRC_ATTR = re.compile(r'\ssrc="([^"]+)"')
+SRCSET_ATTR = re.compile(r'\ssrcset="[^"]*"')
+
+def collect_sources(paths):
+    """Image files among paths; directories contribute their top-level images"""
+    sources = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            sources.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in SOURCE_EXTENSIONS))
+        elif path.suffix.lower() in SOURCE_EXTENSIONS:
+            sources.append(path)
+        else:
+            print(f"⚠️  Not an image: {path}")
+    return sources
+
+def site_pages(root=PROJECT_DIR):
+    return sorted(p for p in Path(root).rglob('*.html')
+                  if not SKIP_PAGE_DIRS & set(p.relative_to(root).parts))
+
+def srcset_for(page, src):
+    """srcset of the WebP variants for an <img> src (relative to page), or None if it has none"""
+    source = (page.parent / src).resolve()
+    entry = load_manifest(source.parent / OPTIMIZED_DIR / MANIFEST_NAME).get(source.name)
+    webps = [v for v in (entry or {}).get('variants', []) if v['format'] == 'webp']
+    if not webps:
+        return None
+    prefix = src.rsplit('/', 1)[0] + '/' if '/' in src else ''
+    return ', '.join(f"{prefix}{v['path']} {v['width']}w" for v in sorted(webps, key=lambda v: v['width']))
+
+def update_pages(pages):
+    """
+    Give every <img> whose src has web variants a srcset of them (replacing
+    an older one), keeping src as the fallback. Returns the pages changed.
+    """
+    changed = []
+    for page in pages:
+        text = page.read_text(encoding='utf-8')
+        
+        def rewrite(match):
+            tag = match.group(0)
+            src = SRC_ATTR.search(tag)
+            if not src or '://' in src.group(1):
+                return tag
+            srcset = srcset_for(page, src.group(1))
+            if not srcset:
+                return tag
+            tag = SRCSET_ATTR.sub('', tag)
+            end = SRC_ATTR.search(tag).end()
+            return f'{tag[:end]} srcset="{srcset}"{tag[end:]}'
+        
+        updated = IMG_TAG.sub(rewrite, text)
+        if updated != text:
+            page.write_text(updated, encoding='utf-8')
+            changed.append(page)
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Create web-optimized variants of generated images")
+    parser.add_argument("paths", nargs='*', default=[str(ASSETS_DIR)],
+                        help="Images or directories (default: assets/)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--widths", type=int, nargs='+', default=DEFAULT_SETTINGS['widths'],
+                        help=f"Responsive widths in pixels (default: {' '.join(map(str, DEFAULT_SETTINGS['widths']))})")
+    parser.add_argument("--force", action="store_true", help="Rebuild even unchanged images")
+    parser.add_argument("--update-pages", action="store_true",
+                        help="Point the site's <img> tags at the WebP variants with srcset")
+    args = parser.parse_args()
+    
+    settings = {**DEFAULT_SETTINGS, 'widths': sorted(set(args.widths))}
+    sources = collect_sources(args.paths)
+    print(f"📦 {len(sources)} images, formats: {', '.join(available_formats(settings))}, "
+          f"widths: {', '.join(map(str, settings['widths']))}")
+    
+    start = time.perf_counter()
+    stats = optimize_images(sources, jobs=args.jobs, force=args.force, settings=settings)
+    print_optimize_report(stats, time.perf_counter() - start)
+    if args.update_pages:
+        changed = update_pages(site_pages())
+        print(f"🔗 srcset updated in {len(changed)} pages")
+    sys.exit(1 if stats['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
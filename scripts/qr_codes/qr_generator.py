@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+QR Code Generator
+Creates the qr_codes/ PNGs - one from --url/--name, a list from a --batch
+JSON file, or every clue page of the site with --from-pages. A manifest
+records the URL and settings behind each PNG so only codes whose URL
+changed are re-rendered, in a process pool. With --short-base the codes
+hold short /q/<code> links that scripts/server.py resolves.
+"""
+
+import os
+import sys
+import json
+import time
+import string
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shared.fonts import get_font
+from shared.qr import (SITE_URL, ERROR_CORRECTION, QUIET_ZONE, QR_MANIFEST, QR_URL_PATHS, SHORT_CODES,
+                       qrcode_available, qr_matrix, qr_image, qr_version, short_target, short_url)
+from shared.render_cache import atomic_save, atomic_write_json, content_key
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+QR_DIR = PROJECT_DIR / 'qr_codes'
+
+# Pixels per module and the URL strip above the code, as in the existing PNGs
+BOX_SIZE = 10
+TEXT_STRIP = 40
+TEXT_SIZE = 12
+
+# QR file prefixes generated for every page the site serves under clue/
+CLUE_PREFIXES = ['artifact', 'botanical', 'document', 'journal', 'vision']
+
+def clues_from_pages(base_url=SITE_URL, project_dir=PROJECT_DIR):
+    """
+    [{'name', 'url'}] for every clue page served from the project root, named
+    like the existing qr_codes/ PNGs (journal_<character>_<entry> for the
+    pages nested under clue/journals/<character>/), so each URL is a page
+    that exists and matches what qr_url_for() derives from the name
+    """
+    base_url = base_url.rstrip('/')
+    project_dir = Path(project_dir)
+    entries = []
+    for prefix in CLUE_PREFIXES:
+        pattern = QR_URL_PATHS[prefix].format(character='*', name='*')
+        for page in sorted(project_dir.glob(pattern)):
+            if prefix == 'journal':
+                name = f"journal_{page.parent.name}_{page.stem}"
+            else:
+                name = f"{prefix}_{page.stem}"
+            entries.append({
+                'name': name,
+                'url': f"{base_url}/{page.relative_to(project_dir).as_posix()}",
+            })
+    return entries
+
+def orphan_codes(output_dir, entries):
+    """Clue PNGs in output_dir with no page to point at (their codes would 404)"""
+    names = {entry['name'] for entry in entries}
+    return sorted(path.stem for path in Path(output_dir).glob('*.png')
+                  if path.stem.partition('_')[0] in CLUE_PREFIXES and path.stem not in names)
+
+SHORT_CODE_ALPHABET = string.digits + string.ascii_uppercase
+SHORT_CODE_LENGTH = 3
+
+def _short_code(target, length):
+    """Code derived from the target, so the same page gets the same code in a fresh table"""
+    n = int.from_bytes(hashlib.sha256(target.encode('utf-8')).digest()[:8], 'big')
+    code = ''
+    for _ in range(length):
+        n, i = divmod(n, len(SHORT_CODE_ALPHABET))
+        code += SHORT_CODE_ALPHABET[i]
+    return code
+
+def load_short_table(output_dir):
+    path = Path(output_dir) / SHORT_CODES
+    if not path.exists():
+        return {'base_url': None, 'codes': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def assign_short_codes(entries, short_base, base_url=SITE_URL, output_dir=QR_DIR):
+    """
+    Swap each entry's URL for a short {short_base}/q/<code> link and record
+    code -> target (see shared.qr.short_target) in the short code table
+    next to the PNGs. Codes already handed out never change, and codes for
+    pages no longer listed are kept so printed cards still work.
+    """
+    table = load_short_table(output_dir)
+    codes = table.get('codes', {})
+    by_target = {target: code for code, target in codes.items()}
+    
+    short_entries = []
+    for entry in entries:
+        target = short_target(entry['url'], base_url)
+        code = by_target.get(target)
+        length = SHORT_CODE_LENGTH
+        while code is None:
+            candidate = _short_code(target, length)
+            if candidate not in codes:
+                code = candidate
+                codes[code] = target
+                by_target[target] = code
+            length += 1
+        short_entries.append({**entry, 'url': short_url(short_base, code), 'target': target})
+    
+    table = {'base_url': short_base.rstrip('/'), 'codes': dict(sorted(codes.items()))}
+    if table != load_short_table(output_dir):
+        atomic_write_json(table, Path(output_dir) / SHORT_CODES)
+    return short_entries
+
+def qr_settings(text=True):
+    return {'error_correction': ERROR_CORRECTION, 'border': QUIET_ZONE,
+            'box_size': BOX_SIZE, 'text': text}
+
+def qr_hash(url, text=True):
+    """Hash of everything a PNG depends on, so a change to any of it re-renders"""
+    return content_key({'url': url, **qr_settings(text)})[:16]
+
+def render_qr_png(url, text=True):
+    """The QR for url at BOX_SIZE px per module, with the URL printed above it"""
+    matrix = qr_matrix(url)
+    code = qr_image(url, len(matrix) * BOX_SIZE)
+    if not text:
+        return code.convert('RGB')
+    
+    img = Image.new('RGB', (code.width, code.height + TEXT_STRIP), 'white')
+    img.paste(code.convert('RGB'), (0, TEXT_STRIP))
+    draw = ImageDraw.Draw(img)
+    font = get_font('sans', TEXT_SIZE)
+    bbox = draw.textbbox((0, 0), url, font=font)
+    text_w, text_h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    draw.text(((img.width - text_w) // 2 - bbox[0], (TEXT_STRIP - text_h) // 2 - bbox[1]),
+              url, fill='black', font=font)
+    return img
+
+def _render_task(task):
+    """Worker: render one PNG and write it in place; returns (name, QR version)"""
+    name, url, text, output_dir = task
+    atomic_save(render_qr_png(url, text), Path(output_dir) / f"{name}.png")
+    return name, qr_version(qr_matrix(url))
+
+def load_manifest(output_dir):
+    path = Path(output_dir) / QR_MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"⚠️  Unreadable manifest {path}, regenerating everything")
+        return {}
+
+def generate_qr_codes(entries, output_dir=QR_DIR, text=True, jobs=1, force=False):
+    """
+    Write a PNG for each {'name', 'url'} entry into output_dir, skipping
+    those whose manifest hash still matches and whose file still exists.
+    PNGs already there but not in the manifest (made by hand, or by an
+    older tool) are left alone unless force.
+    Returns ({generated name: QR version}, skipped count, [kept names]).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    
+    stale = []
+    kept = []
+    for entry in entries:
+        digest = qr_hash(entry['url'], text)
+        recorded = manifest.get(entry['name'], {})
+        if not force and not recorded and (output_dir / f"{entry['name']}.png").exists():
+            kept.append(entry['name'])
+            continue
+        if force or recorded.get('hash') != digest or not (output_dir / f"{entry['name']}.png").exists():
+            stale.append((entry['name'], entry['url'], text, str(output_dir)))
+    
+    generated = {}
+    jobs = max(1, min(jobs, len(stale)))
+    try:
+        if jobs <= 1:
+            generated.update(_render_task(task) for task in stale)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                generated.update(pool.map(_render_task, stale))
+    finally:
+        # Record whatever was written, even if a later code failed
+        for name, url, text_flag, _ in stale:
+            if name in generated:
+                manifest[name] = {'url': url, 'hash': qr_hash(url, text_flag)}
+        if generated:
+            atomic_write_json(dict(sorted(manifest.items())), output_dir / QR_MANIFEST)
+    
+    return generated, len(entries) - len(stale) - len(kept), kept
+
+def load_batch(batch_file):
+    with open(batch_file, encoding='utf-8') as f:
+        entries = json.load(f)
+    for entry in entries:
+        if not entry.get('url') or not entry.get('name'):
+            raise ValueError(f"Each batch entry needs 'url' and 'name': {entry}")
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate QR code PNGs for clues and characters")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="URL to encode (single mode, with --name)")
+    source.add_argument("--batch", help="JSON file with a list of {url, name} objects")
+    source.add_argument("--from-pages", "--from-data", dest="from_pages", action="store_true",
+                        help="Every artifact, botanical, document, journal and vision page under clue/")
+    parser.add_argument("--name", help="Output filename without extension (single mode)")
+    parser.add_argument("--base-url", default=SITE_URL,
+                        help=f"Site root the pages live under (default: {SITE_URL})")
+    parser.add_argument("--short-base",
+                        help="Encode short URL/q/<code> links for server.py instead of full page URLs")
+    parser.add_argument("--output", default=str(QR_DIR), help="Output directory (default: qr_codes/)")
+    parser.add_argument("--no-text", action="store_true", help="Don't add URL text above the QR code")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for rendering (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate even unchanged codes, and overwrite PNGs not made by this generator")
+    args = parser.parse_args()
+    
+    if not qrcode_available():
+        print("❌ The qrcode package is required: pip install -r qr_requirements.txt")
+        sys.exit(1)
+    
+    if args.url:
+        if not args.name:
+            parser.error("--url needs --name")
+        entries = [{'url': args.url, 'name': args.name}]
+    elif args.batch:
+        entries = load_batch(args.batch)
+    else:
+        entries = clues_from_pages(args.base_url)
+        orphans = orphan_codes(args.output, entries)
+        if orphans:
+            print(f"⚠️  {len(orphans)} clue PNGs have no page under clue/ and would 404: {', '.join(orphans)}")
+    
+    if args.short_base:
+        entries = assign_short_codes(entries, args.short_base, args.base_url, args.output)
+        print(f"🔗 {len(entries)} short links in {Path(args.output) / SHORT_CODES}")
+    
+    start = time.perf_counter()
+    generated, skipped, kept = generate_qr_codes(entries, args.output, text=not args.no_text,
+                                                 jobs=args.jobs, force=args.force)
+    elapsed = time.perf_counter() - start
+    
+    for name, version in generated.items():
+        print(f"✅ {name}.png (version {version})")
+    if kept:
+        print(f"⏭️  Kept {len(kept)} existing PNGs the generator didn't make (--force to overwrite): "
+              f"{', '.join(kept)}")
+    print(f"📊 {len(generated)} generated, {skipped} unchanged in {args.output} ({elapsed:.2f}s)")
+    if generated:
+        versions = sorted(generated.values())
+        print(f"   QR versions {versions[0]}-{versions[-1]}, median {versions[len(versions) // 2]}")
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,116 @@
 #!/usr/bin/env python3
 """
 Start local development server for murder mystery game
+Also resolves the short /q/<code> links printed in QR codes made with
+qr_codes/qr_generator.py --short-base
 """
 
 import http.server
 import socketserver
+import argparse
 import os
 import sys
 from pathlib import Path
 
 # Get project root (parent of scripts directory)
-script_dir = Path(__file__).parent
+script_dir = Path(__file__).resolve().parent
 project_root = script_dir.parent
 
+sys.path.insert(0, str(script_dir))
+from shared.qr import SHORT_CODES, SHORT_PATH, load_short_codes
+
 # Change to project root
 os.chdir(project_root)
 
 PORT = 8005
+# Written by qr_codes/qr_generator.py --short-base next to the PNGs
+QR_DIR = project_root / 'qr_codes'
+
+def servable_short_codes(directory=QR_DIR):
+    """
+    code -> target (a site path or a full URL), codes upper-cased as they are
+    matched case-insensitively. Site paths this server has no file for are
+    left out and returned separately, so they answer 404 up front instead of
+    redirecting to one.
+    """
+    codes, missing = {}, {}
+    for code, target in load_short_codes(directory).items():
+        if '://' in target or (project_root / target).is_file():
+            codes[code.upper()] = target
+        else:
+            missing[code.upper()] = target
+    return codes, missing
+
+class ShortLinkHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files, plus /q/<code> looked up in the short code table held in memory"""
+    short_codes = {}
+    serve_direct = False
+    
+    def resolve_short_link(self):
+        """True if the request was a short link and has been answered"""
+        path = self.path.split('?', 1)[0]
+        if path[:len(SHORT_PATH)].lower() != SHORT_PATH:
+            return False
+        target = self.short_codes.get(path[len(SHORT_PATH):].strip('/').upper())
+        if target is None:
+            self.send_error(404, "Unknown short code")
+            return True
+        if '://' in target:
+            self.redirect(target)
+        elif self.serve_direct:
+            # Site pages only use relative links that climb to the root, so they
+            # still resolve from /q/; this saves the phone a second round trip
+            self.path = '/' + target
+            return False
+        else:
+            self.redirect('/' + target)
+        return True
+    
+    def redirect(self, location):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def do_GET(self):
+        if not self.resolve_short_link():
+            super().do_GET()
+    
+    def do_HEAD(self):
+        if not self.resolve_short_link():
+            super().do_HEAD()
+
+parser = argparse.ArgumentParser(description="Serve the game locally")
+parser.add_argument("--port", type=int, default=PORT, help=f"Port to listen on (default: {PORT})")
+parser.add_argument("--direct", action="store_true",
+                    help="Serve short link targets directly instead of redirecting")
+args = parser.parse_args()
 
-Handler = http.server.SimpleHTTPRequestHandler
+ShortLinkHandler.short_codes, missing_targets = servable_short_codes()
+ShortLinkHandler.serve_direct = args.direct
+Handler = ShortLinkHandler
 
 try:
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    with socketserver.TCPServer(("", args.port), Handler) as httpd:
         print("=" * 60)
         print("🔍 Murder Mystery Game - Local Server")
         print("=" * 60)
-        print(f"📡 Server running at: http://localhost:{PORT}/")
+        print(f"📡 Server running at: http://localhost:{args.port}/")
         print(f"📁 Serving from: {project_root}")
+        if ShortLinkHandler.short_codes:
+            mode = "served directly" if args.direct else "302 redirects"
+            print(f"🔗 {len(ShortLinkHandler.short_codes)} short links from {SHORT_CODES} ({mode})")
+        if missing_targets:
+            print(f"⚠️  {len(missing_targets)} short links point at pages not served here: "
+                  f"{', '.join(f'{code} -> {target}' for code, target in sorted(missing_targets.items()))}")
         print("=" * 60)
         print("Press Ctrl+C to stop the server")
         print("=" * 60)
         httpd.serve_forever()
 except OSError as e:
     if "Address already in use" in str(e):
-        print(f"❌ Error: Port {PORT} is already in use")
-        print(f"   Try a different port or stop the process using port {PORT}")
+        print(f"❌ Error: Port {args.port} is already in use")
+        print(f"   Try a different port or stop the process using port {args.port}")
         sys.exit(1)
     else:
         raise
@@ -0,0 +1,4 @@
+"""
+Shared helpers for the murder mystery print generators
+Imported by the card, document and specialized PDF scripts
+"""
@@ -0,0 +1,166 @@
+"""
+Web Asset Pipeline
+Turns full-resolution generator output into what phones should download:
+WebP and AVIF at several responsive widths plus a tiny blurred
+placeholder, recorded in a manifest per directory. Images whose source
+hash and settings are unchanged are skipped
+"""
+
+import io
+import time
+import base64
+from pathlib import Path
+from PIL import Image, ImageFilter, features
+
+from shared.render_cache import atomic_save, atomic_write_json, content_key, load_manifest, run_tasks
+from shared.batch_journal import file_sha256
+
+OPTIMIZED_DIR = 'optimized'
+MANIFEST_NAME = 'manifest.json'
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+# Variant file names keep the source extension, so foo.png and foo.jpg in
+# one directory don't overwrite each other's variants
+VARIANT_NAME = '{stem}-{ext}-{width}.{fmt}'
+
+DEFAULT_SETTINGS = {
+    'widths': [320, 640, 1024],
+    'formats': {
+        'webp': {'quality': 80, 'method': 4},
+        'avif': {'quality': 55, 'speed': 8},
+    },
+    'placeholder_width': 16,
+    'placeholder_blur': 1,
+}
+
+def available_formats(settings=DEFAULT_SETTINGS):
+    """The configured formats this Pillow can encode (AVIF needs Pillow 11.3+ built with libavif)"""
+    return [fmt for fmt in settings['formats'] if features.check(fmt)]
+
+def variant_widths(source_width, widths):
+    """Configured widths below the source's, plus the largest size that doesn't upscale"""
+    below = [w for w in sorted(widths) if w < source_width]
+    return below + [min(source_width, max(widths))]
+
+def placeholder_uri(img, width, blur):
+    """A few-hundred-byte blurred WebP as a data: URI, for inlining while the real image loads"""
+    height = max(1, round(img.height * width / img.width))
+    small = img.resize((width, height), Image.Resampling.BOX).filter(ImageFilter.GaussianBlur(blur))
+    buffer = io.BytesIO()
+    small.save(buffer, format='WEBP', quality=40)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def _optimize_task(task):
+    """Worker: write every variant of one source image; returns its manifest entry"""
+    source, out_dir, settings, source_hash, formats = task
+    source, out_dir = Path(source), Path(out_dir)
+    start = time.perf_counter()
+    with Image.open(source) as img:
+        img.load()
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+        
+        variants = []
+        for width in variant_widths(img.width, settings['widths']):
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS,
+                                                                  reducing_gap=3.0)
+            for fmt in formats:
+                path = out_dir / VARIANT_NAME.format(stem=source.stem, ext=source.suffix[1:].lower(),
+                                                     width=width, fmt=fmt)
+                atomic_save(resized, path, format=fmt.upper(), **settings['formats'][fmt])
+                variants.append({
+                    'path': path.relative_to(out_dir.parent).as_posix(),
+                    'format': fmt,
+                    'width': width,
+                    'height': height,
+                    'bytes': path.stat().st_size,
+                })
+        placeholder = placeholder_uri(img, settings['placeholder_width'], settings['placeholder_blur'])
+        size = img.size
+    
+    return {
+        'source_hash': source_hash,
+        'settings_hash': content_key([settings, formats, VARIANT_NAME]),
+        'width': size[0],
+        'height': size[1],
+        'bytes': source.stat().st_size,
+        'placeholder': placeholder,
+        'variants': variants,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+def _is_current(entry, source_hash, settings_hash, asset_dir):
+    return (entry and entry.get('source_hash') == source_hash
+            and entry.get('settings_hash') == settings_hash
+            and all((asset_dir / v['path']).exists() for v in entry.get('variants', [])))
+
+def optimize_images(sources, jobs=1, force=False, settings=DEFAULT_SETTINGS):
+    """
+    Build web variants for each source image into <its dir>/optimized/ and
+    record them in <its dir>/optimized/manifest.json, keyed by source file
+    name. Sources whose hash and settings match the manifest (and whose
+    variants still exist) are skipped unless force.
+    
+    An image that fails is reported and recorded, and the rest carry on.
+    Returns {'optimized': [names], 'skipped': n, 'failed': {name: error},
+    'source_bytes': n, 'variant_bytes': n} - the byte totals cover the largest WebP per image,
+    what a phone would otherwise have downloaded in place of the original.
+    """
+    formats = available_formats(settings)
+    settings_hash = content_key([settings, formats, VARIANT_NAME])
+    by_dir = {}
+    for source in sources:
+        source = Path(source)
+        if source.suffix.lower() in SOURCE_EXTENSIONS and source.exists():
+            by_dir.setdefault(source.parent, []).append(source)
+    
+    stats = {'optimized': [], 'skipped': 0, 'failed': {}, 'source_bytes': 0, 'variant_bytes': 0}
+    for asset_dir, dir_sources in by_dir.items():
+        out_dir = asset_dir / OPTIMIZED_DIR
+        manifest_path = out_dir / MANIFEST_NAME
+        manifest = load_manifest(manifest_path)
+        
+        tasks = []
+        for source in dir_sources:
+            source_hash = file_sha256(source)
+            if not force and _is_current(manifest.get(source.name), source_hash, settings_hash, asset_dir):
+                stats['skipped'] += 1
+                continue
+            tasks.append((str(source), str(out_dir), settings, source_hash, formats))
+        
+        try:
+            for task, entry, error in run_tasks(_optimize_task, tasks, jobs):
+                name = Path(task[0]).name
+                if error is not None:
+                    stats['failed'][name] = str(error)
+                    print(f"❌ {task[0]}: {error}")
+                    continue
+                # Variants the previous entry had that this one doesn't (old names or widths)
+                old = manifest.get(name) or {}
+                current = {v['path'] for v in entry['variants']}
+                for variant in old.get('variants', []):
+                    if variant['path'] not in current:
+                        (asset_dir / variant['path']).unlink(missing_ok=True)
+                manifest[name] = entry
+                stats['optimized'].append(name)
+        finally:
+            # Keep whatever finished, even if a later image failed
+            if tasks:
+                atomic_write_json(dict(sorted(manifest.items())), manifest_path)
+        
+        for source in dir_sources:
+            entry = manifest.get(source.name)
+            webps = [v for v in entry['variants'] if v['format'] == 'webp'] if entry else []
+            if webps:
+                stats['source_bytes'] += entry['bytes']
+                stats['variant_bytes'] += max(webps, key=lambda v: v['width'])['bytes']
+    return stats
+
+def print_optimize_report(stats, elapsed=None):
+    took = f" in {elapsed:.1f}s" if elapsed is not None else ''
+    failed = f", {len(stats['failed'])} failed" if stats['failed'] else ''
+    print(f"🖼️  Web variants: {len(stats['optimized'])} images optimized, {stats['skipped']} unchanged{failed}{took}")
+    if stats['source_bytes']:
+        saved = 1 - stats['variant_bytes'] / stats['source_bytes']
+        print(f"   Full-size WebP {stats['variant_bytes'] / (1024 * 1024):.1f} MB vs originals "
+              f"{stats['source_bytes'] / (1024 * 1024):.1f} MB ({saved:.0%} smaller)")
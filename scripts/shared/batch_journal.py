@@ -0,0 +1,93 @@
+"""
+Batch Journal
+An append-only JSON-lines log of what happened to each item in a batch
+run, kept next to the batch file, so an interrupted run can pick up where
+it stopped instead of starting again from item one
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+def journal_path(batch_file):
+    batch_file = Path(batch_file)
+    return batch_file.with_name(batch_file.name + '.journal')
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class BatchJournal:
+    """
+    One line per finished item: {'output', 'key', 'status', 'sha256',
+    'seconds', 'attempts', 'error', 'at'}. Each line is flushed and synced
+    as it is written; a line torn by a crash is ignored when reading back.
+    The last line for an output wins.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.torn = False
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                text = f.read()
+            # A crash mid-line leaves no newline; the next record starts its own line
+            self.torn = bool(text) and not text.endswith('\n')
+            for line in text.splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.entries[entry.get('output')] = entry
+    
+    def completed(self, output, key):
+        """
+        True if output was finished from the same prompt/model/params (key)
+        and the file on disk is still the one that was written.
+        """
+        entry = self.entries.get(str(output))
+        if not entry or entry.get('status') != 'done' or entry.get('key') != key:
+            return False
+        try:
+            return file_sha256(output) == entry.get('sha256')
+        except OSError:
+            return False
+    
+    def record(self, output, key, status, seconds=0.0, attempts=0, error=None):
+        entry = {
+            'output': str(output),
+            'key': key,
+            'status': status,
+            'sha256': file_sha256(output) if status == 'done' else None,
+            'seconds': round(seconds, 3),
+            'attempts': attempts,
+            'error': error,
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.torn:
+                line = '\n' + line
+                self.torn = False
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[entry['output']] = entry
+        return entry
+    
+    def reset(self):
+        """Start a fresh journal (the old one is removed)"""
+        with self.lock:
+            self.entries = {}
+            self.torn = False
+            if self.path.exists():
+                self.path.unlink()
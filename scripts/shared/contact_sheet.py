@@ -0,0 +1,39 @@
+"""
+Preview Contact Sheet
+Tiles low-resolution page renders into one PNG so a whole deck or
+document can be checked at a glance before the full-resolution render
+"""
+
+from PIL import Image, ImageDraw
+
+from shared.fonts import get_font
+
+PREVIEW_DPI = 36
+SHEET_BACKGROUND = '#c8c8c8'
+
+def preview_scale(dpi, preview_dpi=PREVIEW_DPI):
+    """Factor that takes a print-resolution layout down to preview_dpi (never up)"""
+    return min(1.0, preview_dpi / dpi)
+
+def contact_sheet(pages, columns=4, gap=12, background=SHEET_BACKGROUND):
+    """Lay pages out left to right, top to bottom, each numbered underneath"""
+    if not pages:
+        return None
+    columns = max(1, min(columns, len(pages)))
+    rows = -(-len(pages) // columns)
+    font = get_font('sans', 10)
+    label_h = 14
+    cell_w = max(p.width for p in pages)
+    cell_h = max(p.height for p in pages) + label_h
+    
+    sheet = Image.new('RGB', (columns * (cell_w + gap) + gap, rows * (cell_h + gap) + gap),
+                      color=background)
+    draw = ImageDraw.Draw(sheet)
+    for i, page in enumerate(pages):
+        row, col = divmod(i, columns)
+        x = gap + col * (cell_w + gap) + (cell_w - page.width) // 2
+        y = gap + row * (cell_h + gap)
+        sheet.paste(page, (x, y))
+        draw.rectangle([x - 1, y - 1, x + page.width, y + page.height], outline='#808080')
+        draw.text((x, y + page.height + 2), str(i + 1), fill='#333333', font=font)
+    return sheet
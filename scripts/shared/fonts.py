@@ -0,0 +1,197 @@
+"""
+Font Discovery and Cache
+Resolves family + style names to font files on macOS, Linux and Windows
+(project-bundled fonts first, then fontconfig and the standard font
+directories) and keeps one ImageFont per (file, size) for the process
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from PIL import ImageFont
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+BUNDLED_FONT_DIR = PROJECT_DIR / 'assets' / 'fonts'
+
+FONT_DIRS = [
+    BUNDLED_FONT_DIR,
+    Path('/System/Library/Fonts'),
+    Path('/System/Library/Fonts/Supplemental'),
+    Path('/Library/Fonts'),
+    Path.home() / 'Library' / 'Fonts',
+    Path('/usr/share/fonts'),
+    Path('/usr/local/share/fonts'),
+    Path.home() / '.local' / 'share' / 'fonts',
+    Path.home() / '.fonts',
+    Path(os.environ.get('WINDIR', 'C:/Windows')) / 'Fonts',
+]
+
+FONT_EXTENSIONS = {'.ttf', '.ttc', '.otf'}
+
+# Logical roles used by the generators, each a list of (family, style)
+# tried in order - the macOS originals first, then common Linux equivalents
+FONT_ROLES = {
+    'serif': [
+        ('Georgia', 'Regular'),
+        ('Gelasio', 'Regular'),
+        ('Liberation Serif', 'Regular'),
+        ('DejaVu Serif', 'Book'),
+        ('Times New Roman', 'Regular'),
+    ],
+    'sans': [
+        ('Helvetica', 'Regular'),
+        ('Liberation Sans', 'Regular'),
+        ('Arial', 'Regular'),
+        ('DejaVu Sans', 'Book'),
+    ],
+    'script': [
+        ('Snell Roundhand', 'Regular'),
+        ('URW Chancery L', 'Medium Italic'),
+        ('Z003', 'Medium Italic'),
+        ('Great Vibes', 'Regular'),
+        ('Dancing Script', 'Regular'),
+    ],
+    'handwriting': [
+        ('Bradley Hand', 'Bold'),
+        ('Noteworthy', 'Light'),
+        ('Ink Free', 'Regular'),
+        ('Caveat', 'Regular'),
+        ('Kalam', 'Regular'),
+        ('Homemade Apple', 'Regular'),
+    ],
+}
+
+# Roles to fall back on when none of a role's families are installed
+ROLE_FALLBACKS = {
+    'serif': ['sans'],
+    'sans': ['serif'],
+    'script': ['serif', 'sans'],
+    'handwriting': ['script', 'serif', 'sans'],
+}
+
+REGULAR_STYLES = {'', 'regular', 'book', 'roman', 'normal'}
+
+_lock = threading.RLock()
+_file_index = None
+_resolved = {}
+_fonts = {}
+_warned = set()
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+def _build_file_index():
+    """Map normalized file stems to paths, scanning each font directory once"""
+    index = {}
+    for font_dir in FONT_DIRS:
+        if not font_dir.is_dir():
+            continue
+        for root, _, files in os.walk(font_dir):
+            for name in files:
+                path = Path(root) / name
+                if path.suffix.lower() in FONT_EXTENSIONS:
+                    index.setdefault(_normalize(path.stem), str(path))
+    return index
+
+def _fontconfig_match(family, style):
+    """Ask fontconfig for family:style; only accept a real family match"""
+    if not shutil.which('fc-match'):
+        return None
+    try:
+        result = subprocess.run(
+            ['fc-match', '-f', '%{family}|%{file}', f'{family}:style={style}'],
+            capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0 or '|' not in result.stdout:
+        return None
+    families, path = result.stdout.rsplit('|', 1)
+    wanted = _normalize(family)
+    if any(_normalize(f) == wanted for f in families.split(',')) and Path(path).exists():
+        return path
+    return None
+
+def find_font_file(family, style='Regular'):
+    """Resolve a family + style name to a font file path, or None"""
+    global _file_index
+    key = (family, style)
+    with _lock:
+        if key in _resolved:
+            return _resolved[key]
+        
+        if _file_index is None:
+            _file_index = _build_file_index()
+        
+        family_n = _normalize(family)
+        style_n = _normalize(style)
+        candidates = [family_n + style_n]
+        if style_n in REGULAR_STYLES:
+            candidates += [family_n, family_n + 'regular']
+        
+        path = None
+        # Bundled and directory fonts win over fontconfig substitutes
+        for candidate in candidates:
+            if candidate in _file_index:
+                path = _file_index[candidate]
+                break
+        if path is None:
+            path = _fontconfig_match(family, style)
+        
+        _resolved[key] = path
+        return path
+
+def resolve_role(role, fallbacks=True):
+    """
+    Return the font file for a logical role ('serif', 'sans', 'script', 'handwriting'),
+    trying the roles in ROLE_FALLBACKS when none of its own fonts is installed
+    (unless fallbacks is False).
+    """
+    for family, style in FONT_ROLES.get(role, []):
+        path = find_font_file(family, style)
+        if path:
+            return path
+    if not fallbacks:
+        return None
+    for fallback in ROLE_FALLBACKS.get(role, []):
+        for family, style in FONT_ROLES[fallback]:
+            path = find_font_file(family, style)
+            if path:
+                return path
+    return None
+
+def get_font(name, size, style='Regular'):
+    """
+    Return an ImageFont for a role ('serif', 'sans', 'script', 'handwriting'), a family
+    name or a font file path, cached by (file, size).
+    
+    Falls back to PIL's built-in font at the requested size, with a
+    one-time warning, when nothing matches.
+    """
+    if name in FONT_ROLES:
+        path = resolve_role(name)
+    elif Path(name).suffix.lower() in FONT_EXTENSIONS:
+        path = name if Path(name).exists() else None
+    else:
+        path = find_font_file(name, style)
+    
+    key = (path, size)
+    with _lock:
+        font = _fonts.get(key)
+        if font is None:
+            if path:
+                font = ImageFont.truetype(path, size)
+            else:
+                if name not in _warned:
+                    _warned.add(name)
+                    print(f"⚠️  No font found for '{name}', using PIL default "
+                          f"(add .ttf files to {BUNDLED_FONT_DIR})")
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow < 10.1 only has the fixed-size bitmap font
+                    font = ImageFont.load_default()
+            _fonts[key] = font
+        return font
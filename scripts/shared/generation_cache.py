@@ -0,0 +1,109 @@
+"""
+Generated Image Cache
+Keeps the bytes an image backend returned under a hash of prompt, model
+and generation parameters, so re-running a batch only pays for the
+prompts that changed. Pruned least-recently-used first to a size cap
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+from shared.render_cache import CACHE_ROOT, atomic_write_bytes, atomic_write_json, content_key
+
+GENERATION_CACHE_DIR = CACHE_ROOT / 'generated_images'
+DEFAULT_MAX_MB = 1024
+
+def generation_key(prompt, model, params=None, backend='gemini'):
+    """Cache key for one generation; other backends (the stub) never share Gemini's entries"""
+    key = {'prompt': prompt, 'model': model, 'params': params or {}}
+    if backend != 'gemini':
+        key['backend'] = backend
+    return content_key(key)
+
+class GenerationCache:
+    """
+    <cache_dir>/<key[:2]>/<key>.img holds the image bytes and <key>.json
+    the metadata (prompt, model, params, size, when generated). A hit
+    touches the file, so its mtime is the last time it was used.
+    """
+    
+    def __init__(self, cache_dir=GENERATION_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+    
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.img'
+    
+    def get(self, key):
+        """Path of the cached image, or None"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+    
+    def metadata(self, key):
+        try:
+            with open(self._path(key).with_suffix('.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, key, data, **metadata):
+        path = self._path(key)
+        # Metadata first: an image without it is still usable, the reverse isn't
+        atomic_write_json({**metadata, 'bytes': len(data), 'created': time.time()},
+                          path.with_suffix('.json'))
+        atomic_write_bytes(data, path)
+        return path
+    
+    def export(self, key, output_path):
+        """
+        Copy the cached image to output_path, swapped in with a rename. Never
+        a hard link: the output is an asset that gets edited, and a hit's
+        utime would move its mtime.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=output_path.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copy2(self._path(key), tmp)
+            os.replace(tmp, output_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    
+    def prune(self):
+        """Delete least-recently-used images until the cache fits max_bytes; returns (files, bytes) freed"""
+        entries = []
+        for path in self.cache_dir.glob('*/*.img'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = freed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            for victim in (path, path.with_suffix('.json')):
+                try:
+                    victim.unlink()
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
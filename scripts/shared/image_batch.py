@@ -0,0 +1,210 @@
+"""
+Concurrent Image Generation
+Runs prompts through an image backend (Gemini, or a local stub for offline
+benchmarking) on a thread pool, with one client per worker, a shared
+token-bucket rate limit, and retries with exponential backoff on
+transient errors
+"""
+
+import io
+import os
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PIL import Image, ImageDraw
+
+DEFAULT_MODEL = 'gemini-2.5-flash-image'
+
+class TransientError(Exception):
+    """A failure worth retrying (rate limited, overloaded, timed out, connection dropped)"""
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, in bursts of up to
+    `burst`; acquire() blocks until a token is free. rate=None is unlimited.
+    """
+    
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class GeminiBackend:
+    """Google Gemini image models; the SDK is imported and configured once, on first use"""
+    name = 'gemini'
+    
+    # google.api_core exception names that mean "try again later"
+    TRANSIENT_ERRORS = {'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+                        'DeadlineExceeded', 'InternalServerError', 'GatewayTimeout'}
+    
+    def __init__(self, api_key=None):
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        self._genai = None
+        self._lock = threading.Lock()
+    
+    def available(self):
+        """None if ready, else a message saying what is missing"""
+        try:
+            import google.generativeai  # noqa: F401
+        except ImportError:
+            return "google-generativeai not installed. Run: pip install google-generativeai"
+        if not self.api_key or self.api_key == 'your_gemini_api_key_here':
+            return "GEMINI_API_KEY not set in .env file"
+        return None
+    
+    def create_client(self, model_name):
+        with self._lock:
+            if self._genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._genai = genai
+        return self._genai.GenerativeModel(model_name)
+    
+    def generate(self, client, prompt, params=None):
+        """Image bytes for prompt; raises TransientError for retryable failures"""
+        try:
+            response = client.generate_content([prompt], generation_config=params or None)
+        except (ConnectionError, TimeoutError) as e:
+            raise TransientError(str(e)) from e
+        except Exception as e:
+            if any(cls.__name__ in self.TRANSIENT_ERRORS for cls in type(e).__mro__):
+                raise TransientError(str(e)) from e
+            raise
+        
+        if response and response.parts:
+            for part in reversed(response.parts):
+                if hasattr(part, 'inline_data') and part.inline_data.data:
+                    return part.inline_data.data
+        raise ValueError("No image data in response")
+
+class StubBackend:
+    """
+    Offline stand-in: after `latency` seconds returns a PNG whose colours
+    are derived from the prompt, and fails transiently at `failure_rate`,
+    so throughput, rate limiting and retries can be exercised without an API key.
+    """
+    name = 'stub'
+    
+    def __init__(self, latency=1.0, failure_rate=0.0, size=(512, 512), seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.size = size
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def available(self):
+        return None
+    
+    def create_client(self, model_name):
+        return {'model': model_name}
+    
+    def generate(self, client, prompt, params=None):
+        time.sleep(self.latency)
+        with self._lock:
+            fail = self.random.random() < self.failure_rate
+        if fail:
+            raise TransientError("stub: simulated 503")
+        
+        digest = hashlib.sha256(f"{client['model']}\n{prompt}".encode('utf-8')).digest()
+        img = Image.new('RGB', self.size, tuple(digest[:3]))
+        draw = ImageDraw.Draw(img)
+        w, h = self.size
+        for i in range(8):
+            draw.rectangle([i * w // 16, i * h // 16, w - i * w // 16, h - i * h // 16],
+                           outline=tuple(digest[3 + i * 3:6 + i * 3]), width=max(1, w // 64))
+        draw.text((10, 10), prompt[:60], fill='white')
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+def generate_with_retry(backend, client, prompt, params=None, retries=3, backoff=2.0, limiter=None):
+    """
+    (image bytes, attempts). Transient errors are retried up to `retries`
+    times, waiting backoff, 2*backoff, 4*backoff... (with jitter) between
+    attempts; other errors propagate straight away. The exception
+    raised carries the number of attempts made as `.attempts`.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        if limiter:
+            limiter.acquire()
+        try:
+            return backend.generate(client, prompt, params), attempt
+        except Exception as e:
+            e.attempts = attempt
+            if not isinstance(e, TransientError) or attempt > retries:
+                raise
+            delay = backoff * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+            print(f"   ↻ {e} - retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+def run_batch(jobs, backend, handle, workers=4, rate=None, retries=3, backoff=2.0):
+    """
+    Generate every job ({'prompt', 'model', 'params', ...}) and call
+    handle(job, image_bytes) in the worker that produced it. Each worker
+    thread keeps its own client per model; `rate` (requests per second,
+    shared by all workers) caps the request rate including retries.
+    
+    Yields one result dict per job as it finishes: 'job', 'status'
+    ('done' or 'failed'), 'attempts', 'seconds', 'error' and whatever
+    handle() returned as 'output'.
+    """
+    limiter = TokenBucket(rate, burst=workers)
+    local = threading.local()
+    
+    def client_for(model):
+        clients = getattr(local, 'clients', None)
+        if clients is None:
+            clients = local.clients = {}
+        if model not in clients:
+            clients[model] = backend.create_client(model)
+        return clients[model]
+    
+    def work(job):
+        start = time.perf_counter()
+        result = {'job': job, 'status': 'failed', 'attempts': 0, 'output': None, 'error': None}
+        try:
+            model = job.get('model') or DEFAULT_MODEL
+            data, result['attempts'] = generate_with_retry(backend, client_for(model), job['prompt'],
+                                                           job.get('params'), retries, backoff, limiter)
+            result['output'] = handle(job, data)
+            result['status'] = 'done'
+        except Exception as e:
+            result['attempts'] = getattr(e, 'attempts', 1)
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - start
+        return result
+    
+    workers = max(1, min(workers, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(work, job) for job in jobs]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
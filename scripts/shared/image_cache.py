@@ -0,0 +1,198 @@
+"""
+Decoded Image Cache
+Keeps decoded, resized images in memory so repeated card and page
+renders reuse them instead of decoding and resampling again
+"""
+
+import math
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image
+
+from shared.render_cache import CACHE_ROOT, TileCache, content_key
+
+DEFAULT_CACHE_MB = 256
+
+# Preview-sized decodes are kept on disk too: PNG has no draft mode, so
+# decoding full-size artwork would otherwise dominate every preview run
+PREVIEW_THUMB_DIR = CACHE_ROOT / 'preview_thumbs'
+
+def image_nbytes(img):
+    """Approximate in-memory size of a decoded image"""
+    return img.width * img.height * len(img.getbands())
+
+def thumbnail_size(size, box):
+    """The size Image.thumbnail(box) produces for an image of this size, without the image"""
+    w, h = size
+    x, y = map(math.floor, box)
+    if x >= w and y >= h:
+        return w, h
+    aspect = w / h
+    
+    def round_aspect(number, key):
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+    
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    return x, y
+
+def read_image_size(path):
+    """
+    Pixel size from the file header alone (no pixel data is decoded).
+    Returns None if the file is missing or not an image.
+    """
+    try:
+        if not Path(path).is_file():
+            return None
+        with Image.open(path) as img:
+            return img.size
+    except (OSError, ValueError):
+        return None
+
+def draft_fit(src, box, fit='thumbnail'):
+    """
+    Quick, lower-quality fit for previews: JPEGs are decoded at a reduced
+    scale with draft(), other formats shrunk by an integer reduce(), and
+    only the small remainder is resampled (bilinear, no LANCZOS).
+    """
+    box = tuple(box)
+    if fit == 'resize':
+        target = box
+    else:
+        ratio = min(box[0] / src.width, box[1] / src.height, 1)
+        target = (max(1, int(src.width * ratio)), max(1, int(src.height * ratio)))
+    
+    src.draft('L' if src.mode == 'L' else 'RGB', target)
+    img = src
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode == 'PA' else 'RGB')
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor > 1:
+        img = img.reduce(factor)
+    if img.size != target:
+        img = img.resize(target, Image.Resampling.BILINEAR)
+    return img.copy() if img is src else img
+
+class ImageCache:
+    """
+    LRU cache of decoded images keyed by (path, mtime, target box, fit).
+    
+    Cached images are shared between callers - treat them as read-only
+    and copy() before drawing on them.
+    """
+    
+    def __init__(self, max_mb=DEFAULT_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._thumbs = TileCache(PREVIEW_THUMB_DIR)
+    
+    def get(self, path, box, fit='thumbnail', resample=Image.Resampling.LANCZOS, fast=False):
+        """
+        Return the image at path fitted to box, or None if the file is missing.
+        
+        fit='thumbnail' keeps the aspect ratio inside box (like Image.thumbnail),
+        fit='resize' scales to exactly box. fast=True uses draft_fit for
+        previews and ignores resample.
+        """
+        path = Path(path)
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        mtime = st.st_mtime_ns
+        
+        key = (str(path.resolve()), mtime, tuple(box), fit, resample, fast)
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+        
+        if fast:
+            img = self._load_preview(path, mtime, box, fit)
+        else:
+            img = self._load(path, box, fit, resample)
+        self._store(key, img)
+        return img
+    
+    def _load_preview(self, path, mtime, box, fit):
+        thumb_key = content_key([str(path.resolve()), mtime, list(box), fit])
+        img = self._thumbs.get(thumb_key)
+        if img is None:
+            with Image.open(path) as src:
+                img = draft_fit(src, box, fit)
+            self._thumbs.put(thumb_key, img)
+        return img
+    
+    def _load(self, path, box, fit, resample):
+        with Image.open(path) as src:
+            if fit == 'resize':
+                return src.resize(tuple(box), resample)
+            src.thumbnail(tuple(box), resample)
+            return src.copy()
+    
+    def _store(self, key, img):
+        size = image_nbytes(img)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = img
+            self.current_bytes += size
+            self._evict()
+    
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self.current_bytes -= image_nbytes(old)
+            self.evictions += 1
+    
+    def set_limit(self, max_mb):
+        """Change the memory cap, evicting least recently used images if needed"""
+        with self._lock:
+            self.max_bytes = int(max_mb * 1024 * 1024)
+            self._evict()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+        }
+    
+    def summary(self):
+        mb = self.current_bytes / (1024 * 1024)
+        return (f"🖼️  Image cache: {self.hits} hits, {self.misses} misses, "
+                f"{self.evictions} evictions ({len(self._entries)} images, {mb:.1f} MB)")
+
+_shared_cache = None
+
+def shared_image_cache(max_mb=None):
+    """Process-wide cache used by all generators; max_mb resizes it"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ImageCache(max_mb if max_mb is not None else DEFAULT_CACHE_MB)
+    elif max_mb is not None:
+        _shared_cache.set_limit(max_mb)
+    return _shared_cache
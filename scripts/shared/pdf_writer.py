@@ -0,0 +1,218 @@
+"""
+Streaming PDF Page Writer
+Appends each rendered page to the output PDF as soon as it is finished,
+so memory stays flat no matter how many pages a deck or photo book has
+"""
+
+import io
+import os
+import zlib
+from pathlib import Path
+from PIL import Image, ImageChops, features
+
+# Page modes a generator can render in: 'RGB' as before, 'L' (grayscale)
+# and '1' (black and white, drawn in 'L' and thresholded at encode time),
+# or 'auto' to render in RGB and store each page in the smallest mode
+# that loses nothing
+PAGE_MODES = ('RGB', 'L', '1', 'auto')
+
+class EncodedPage:
+    """A page image already compressed into a PDF image stream (picklable)"""
+    
+    def __init__(self, width, height, colorspace, bits, filter_name, data, decode_parms=None):
+        self.width = width
+        self.height = height
+        self.colorspace = colorspace
+        self.bits = bits
+        self.filter_name = filter_name
+        self.data = data
+        self.decode_parms = decode_parms
+
+def canvas_mode(page_mode):
+    """Image mode to draw a page in for a given page mode"""
+    if page_mode not in PAGE_MODES:
+        raise ValueError(f"Unknown page mode '{page_mode}' (expected one of {', '.join(PAGE_MODES)})")
+    return 'L' if page_mode in ('L', '1') else 'RGB'
+
+def reduce_page(img, page_mode):
+    """
+    Convert a drawn page to the mode it is stored in. Returns img itself
+    when nothing changes; the caller owns (and closes) both.
+    """
+    if page_mode == '1':
+        return img.convert('1', dither=Image.Dither.NONE)
+    if page_mode == 'L':
+        return img if img.mode == 'L' else img.convert('L')
+    if page_mode != 'auto' or img.mode != 'RGB':
+        return img
+    
+    # No colour anywhere: every pixel has r == g == b
+    r, g, b = img.split()
+    if ImageChops.difference(r, g).getbbox() or ImageChops.difference(g, b).getbbox():
+        return img
+    # Only pure black and white left: store as 1-bit
+    histogram = r.histogram()
+    if not any(histogram[1:255]):
+        return r.convert('1', dither=Image.Dither.NONE)
+    return r
+
+def _ccitt_g4(img):
+    """CCITT Group 4 stream and DecodeParms for a mode '1' image, or None without libtiff"""
+    if not features.check('libtiff'):
+        return None
+    buf = io.BytesIO()
+    try:
+        img.save(buf, 'TIFF', compression='group4', tiffinfo={278: img.height})
+        buf.seek(0)
+        with Image.open(buf) as tiff:
+            offsets = tiff.tag_v2.get(273)
+            counts = tiff.tag_v2.get(279)
+            photometric = tiff.tag_v2.get(262, 0)
+            fill_order = tiff.tag_v2.get(266, 1)
+    except (OSError, ValueError):
+        return None
+    if not offsets or len(offsets) != 1 or fill_order != 1:
+        return None
+    
+    data = buf.getvalue()[offsets[0]:offsets[0] + counts[0]]
+    # Fax coding treats 0 bits as white; Pillow writes '1' as min-is-black
+    black_is_1 = ' /BlackIs1 true' if photometric == 1 else ''
+    return data, f'<< /K -1 /Columns {img.width} /Rows {img.height}{black_is_1} >>'
+
+def encode_page(img, compression='jpeg', quality=90):
+    """
+    Compress a page image for the PDF.
+    
+    compression='jpeg' uses DCTDecode (small, good for photos),
+    'flate' is lossless (crisp text and QR modules). 'L' pages are
+    stored as 8-bit gray; mode '1' pages as 1-bit CCITT Group 4 when
+    Pillow has libtiff, 1-bit Flate otherwise.
+    """
+    if img.mode not in ('1', 'L', 'RGB'):
+        img = img.convert('RGB')
+    colorspace = 'DeviceRGB' if img.mode == 'RGB' else 'DeviceGray'
+    
+    if img.mode == '1':
+        g4 = _ccitt_g4(img)
+        if g4:
+            return EncodedPage(img.width, img.height, colorspace, 1, 'CCITTFaxDecode', g4[0], g4[1])
+        return EncodedPage(img.width, img.height, colorspace, 1, 'FlateDecode',
+                           zlib.compress(img.tobytes(), 6))
+    if compression == 'jpeg':
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=quality)
+        return EncodedPage(img.width, img.height, colorspace, 8, 'DCTDecode', buf.getvalue())
+    return EncodedPage(img.width, img.height, colorspace, 8, 'FlateDecode',
+                       zlib.compress(img.tobytes(), 6))
+
+class PDFPageWriter:
+    """
+    Write a PDF one full-page image at a time.
+    
+    Each page is encoded and flushed to disk when added, then the caller
+    can drop it. Output goes to a .part file that is renamed into place on
+    close, so an interrupted run never leaves a truncated PDF behind.
+    
+    Usage:
+        with PDFPageWriter('cards.pdf', resolution=300) as writer:
+            for page in pages:
+                writer.add_page(page)
+    """
+    
+    def __init__(self, output_file, resolution=72, compression='jpeg', quality=90):
+        self.output_file = Path(output_file)
+        self.resolution = resolution
+        self.compression = compression
+        self.quality = quality
+        self.page_count = 0
+        self._part = self.output_file.with_name(self.output_file.name + '.part')
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._part, 'wb')
+        self._offsets = {}
+        self._page_ids = []
+        # Objects 1 and 2 (catalog and page tree) are written on close
+        self._next_id = 3
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+    
+    def _write_object(self, obj_id, body, stream=None):
+        self._offsets[obj_id] = self._file.tell()
+        self._file.write(f'{obj_id} 0 obj\n'.encode())
+        self._file.write(body.encode())
+        if stream is not None:
+            self._file.write(b'\nstream\n')
+            self._file.write(stream)
+            self._file.write(b'\nendstream')
+        self._file.write(b'\nendobj\n')
+    
+    def add_page(self, img):
+        """Encode and append one page image"""
+        self.add_encoded(encode_page(img, self.compression, self.quality))
+    
+    def add_encoded(self, page):
+        """Append a page already compressed with encode_page"""
+        image_id, content_id, page_id = self._next_id, self._next_id + 1, self._next_id + 2
+        self._next_id += 3
+        
+        # Page size in points from pixel size and resolution
+        w_pt = page.width * 72.0 / self.resolution
+        h_pt = page.height * 72.0 / self.resolution
+        
+        parms = f' /DecodeParms {page.decode_parms}' if page.decode_parms else ''
+        self._write_object(image_id, (
+            f'<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height}'
+            f' /ColorSpace /{page.colorspace} /BitsPerComponent {page.bits}'
+            f' /Filter /{page.filter_name}{parms} /Length {len(page.data)} >>'
+        ), page.data)
+        
+        content = f'q {w_pt:.4f} 0 0 {h_pt:.4f} 0 0 cm /Im0 Do Q'.encode()
+        self._write_object(content_id, f'<< /Length {len(content)} >>', content)
+        
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w_pt:.4f} {h_pt:.4f}]'
+            f' /Resources << /XObject << /Im0 {image_id} 0 R >> >>'
+            f' /Contents {content_id} 0 R >>'
+        ))
+        self._page_ids.append(page_id)
+        self.page_count += 1
+    
+    def close(self):
+        """Finish the PDF; returns the page count (0 pages = no file written)"""
+        if self._file.closed:
+            return self.page_count
+        if not self._page_ids:
+            self.abort()
+            return 0
+        
+        kids = ' '.join(f'{pid} 0 R' for pid in self._page_ids)
+        self._write_object(1, '<< /Type /Catalog /Pages 2 0 R >>')
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>')
+        
+        xref_offset = self._file.tell()
+        size = self._next_id
+        self._file.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode())
+        for obj_id in range(1, size):
+            self._file.write(f'{self._offsets[obj_id]:010d} 00000 n \n'.encode())
+        self._file.write((
+            f'trailer\n<< /Size {size} /Root 1 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        ).encode())
+        self._file.close()
+        os.replace(self._part, self.output_file)
+        return self.page_count
+    
+    def abort(self):
+        """Discard the partial output"""
+        if not self._file.closed:
+            self._file.close()
+        if self._part.exists():
+            self._part.unlink()
@@ -0,0 +1,43 @@
+"""
+Ordered Prefetch Pipeline
+Runs a function over a list of inputs on a thread pool, a bounded number
+of items ahead of the consumer, and yields the results in input order
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+def prefetch(func, inputs, workers=1, ahead=None):
+    """
+    Yield func(x) for each x in inputs, in order.
+    
+    With workers > 1, up to `ahead` results (default 2 per worker) are
+    computed in advance on a thread pool, so the caller's own work on one
+    result overlaps with the next ones being produced - and memory stays
+    bounded however long the list is. Pillow releases the GIL while
+    decoding and resampling, so image loading scales across threads.
+    """
+    if workers <= 1:
+        for x in inputs:
+            yield func(x)
+        return
+    
+    ahead = max(1, ahead or workers * 2)
+    remaining = iter(inputs)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for x in remaining:
+                pending.append(pool.submit(func, x))
+                if len(pending) >= ahead:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                for x in remaining:
+                    pending.append(pool.submit(func, x))
+                    break
+                yield result
+        finally:
+            # Consumer stopped early (or failed): drop work not yet started
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,200 @@
+"""
+QR Code Matrices
+Builds the module matrix for a URL once (cached per URL) and draws it as
+exact integer-scaled pixels or vector rectangles, instead of reopening
+and resampling the PNGs in qr_codes/
+"""
+
+import json
+import threading
+from pathlib import Path
+from PIL import Image
+
+SITE_URL = 'https://filatova-elena.github.io/murder_mystery'
+
+# QR file prefix -> page on the site; journal files are
+# journal_<character>_<entry>.png and nest under the character
+QR_URL_PATHS = {
+    'artifact': 'clue/artifacts/{name}.html',
+    'botanical': 'clue/botanicals/{name}.html',
+    'character': 'character/{name}.html',
+    'document': 'clue/documents/{name}.html',
+    'vision': 'clue/vision/{name}.html',
+    'journal': 'clue/journals/{character}/{name}.html',
+}
+
+# Settings the PNGs in qr_codes/ were made with
+ERROR_CORRECTION = 'L'
+QUIET_ZONE = 4
+
+# Written by qr_codes/qr_generator.py next to the PNGs: name -> {url, hash},
+# and with --short-base, {base_url, codes: {code: target}} for server.py
+QR_MANIFEST = 'qr_manifest.json'
+SHORT_CODES = 'short_codes.json'
+SHORT_PATH = '/q/'
+
+# Characters QR alphanumeric mode packs at 5.5 bits each instead of 8
+QR_ALPHANUMERIC = frozenset('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:')
+
+_lock = threading.Lock()
+_matrices = {}
+_images = {}
+_manifests = {}
+
+def qrcode_available():
+    try:
+        import qrcode  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def load_qr_manifest(directory):
+    """The generator's manifest for a QR directory ({} if there is none), cached until it changes"""
+    path = Path(directory) / QR_MANIFEST
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        cached = _manifests.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    with _lock:
+        _manifests[path] = (mtime, manifest)
+    return manifest
+
+def load_short_codes(directory):
+    """{code: target} from a short code table ({} if there is none)"""
+    try:
+        with open(Path(directory) / SHORT_CODES, encoding='utf-8') as f:
+            return json.load(f).get('codes', {})
+    except (OSError, ValueError):
+        return {}
+
+def short_url(short_base, code):
+    """
+    The URL a short code is printed as. Upper-cased when that leaves only
+    QR alphanumeric characters (host names and short codes don't care), so
+    the QR packs it into fewer modules.
+    """
+    url = f"{short_base.rstrip('/')}{SHORT_PATH}{code}"
+    upper = url.upper()
+    return upper if set(upper) <= QR_ALPHANUMERIC else url
+
+def short_target(url, base_url=SITE_URL):
+    """What a short code points at: the site path for pages under base_url, else the full URL"""
+    base_url = base_url.rstrip('/')
+    return url[len(base_url) + 1:] if url.startswith(base_url + '/') else url
+
+def short_link_for(url, directory, base_url=SITE_URL):
+    """The short link registered for url in a directory's short code table, or None"""
+    path = Path(directory) / SHORT_CODES
+    try:
+        with open(path, encoding='utf-8') as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        return None
+    target = short_target(url, base_url)
+    for code, registered in table.get('codes', {}).items():
+        if registered == target:
+            return short_url(table['base_url'], code)
+    return None
+
+def qr_url_for(qr_file, base_url=SITE_URL):
+    """
+    URL a qr_codes/ PNG encodes: as recorded in the generator's manifest,
+    else from its file name; None if the name doesn't follow the convention
+    """
+    qr_file = Path(qr_file)
+    entry = load_qr_manifest(qr_file.parent).get(qr_file.stem)
+    if entry and entry.get('url'):
+        return entry['url']
+    prefix, _, rest = qr_file.stem.partition('_')
+    template = QR_URL_PATHS.get(prefix)
+    if not template or not rest:
+        return None
+    if prefix == 'journal':
+        character, _, name = rest.partition('_')
+        if not name:
+            return None
+        return f"{base_url}/{template.format(character=character, name=name)}"
+    return f"{base_url}/{template.format(name=rest)}"
+
+def qr_matrix(url, error_correction=ERROR_CORRECTION, border=QUIET_ZONE):
+    """Module matrix for url (rows of booleans, True = dark), quiet zone included"""
+    key = (url, error_correction, border)
+    with _lock:
+        matrix = _matrices.get(key)
+    if matrix is None:
+        import qrcode
+        levels = {
+            'L': qrcode.constants.ERROR_CORRECT_L,
+            'M': qrcode.constants.ERROR_CORRECT_M,
+            'Q': qrcode.constants.ERROR_CORRECT_Q,
+            'H': qrcode.constants.ERROR_CORRECT_H,
+        }
+        qr = qrcode.QRCode(error_correction=levels[error_correction], border=border)
+        qr.add_data(url)
+        qr.make(fit=True)
+        matrix = tuple(tuple(row) for row in qr.get_matrix())
+        with _lock:
+            _matrices[key] = matrix
+    return matrix
+
+def qr_version(matrix, border=QUIET_ZONE):
+    """QR version (1-40) of a matrix built with the given quiet zone"""
+    return (len(matrix) - 2 * border - 17) // 4
+
+def qr_fit_size(matrix, box_size):
+    """Side of the largest whole-pixel-per-module QR that fits box_size (at least 1px per module)"""
+    n = len(matrix)
+    return n * max(1, box_size // n)
+
+def qr_image(url, box_size, error_correction=ERROR_CORRECTION, border=QUIET_ZONE):
+    """
+    The QR for url as a mode '1' image, each module exactly
+    box_size // modules pixels, so edges stay sharp at any size.
+    """
+    matrix = qr_matrix(url, error_correction, border)
+    size = qr_fit_size(matrix, box_size)
+    key = (url, error_correction, border, size)
+    with _lock:
+        img = _images.get(key)
+    if img is None:
+        n = len(matrix)
+        modules = Image.new('1', (n, n), 1)
+        modules.putdata([0 if dark else 1 for row in matrix for dark in row])
+        img = modules.resize((size, size), Image.Resampling.NEAREST)
+        with _lock:
+            _images[key] = img
+    return img
+
+def draw_qr_vector(canvas, matrix, x, y, size):
+    """
+    Draw a QR on a reportlab canvas as filled rectangles, one per run of
+    dark modules in a row, in a size x size square with (x, y) at the
+    bottom-left.
+    """
+    n = len(matrix)
+    module = size / n
+    path = canvas.beginPath()
+    for r, row in enumerate(matrix):
+        top = y + size - (r + 1) * module
+        c = 0
+        while c < n:
+            if not row[c]:
+                c += 1
+                continue
+            start = c
+            while c < n and row[c]:
+                c += 1
+            path.rect(x + start * module, top, (c - start) * module, module)
+    canvas.saveState()
+    canvas.setFillColorRGB(0, 0, 0)
+    canvas.drawPath(path, stroke=0, fill=1)
+    canvas.restoreState()
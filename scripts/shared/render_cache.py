@@ -0,0 +1,138 @@
+"""
+Content-Addressed Render Cache
+Stores rendered images on disk under a hash of everything that went into
+them, so unchanged items are composited from cache instead of re-rendered
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+CACHE_ROOT = PROJECT_DIR / '.cache'
+
+# Permissions a plain open() gives a new file; mkstemp's are owner-only.
+# Read once here, since reading the umask means briefly changing it
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+def content_key(obj):
+    """Stable sha256 of any JSON-serialisable value"""
+    blob = json.dumps(obj, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+def file_fingerprint(paths):
+    """(path, mtime, size) for each path; missing files are recorded as such"""
+    result = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            result.append((str(path), st.st_mtime_ns, st.st_size))
+        except OSError:
+            result.append((str(path), None, None))
+    return result
+
+def source_fingerprint(paths):
+    """Hash of source file contents, to invalidate caches when drawing code changes"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def atomic_save(img, path, **params):
+    """Save an image via a temp file + rename so readers never see a partial file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fmt = params.pop('format', None) or Image.registered_extensions()[path.suffix.lower()]
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            img.save(f, format=fmt, **params)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def atomic_write_bytes(data, path):
+    """Write bytes via a temp file + rename, like atomic_save"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+def atomic_write_json(obj, path):
+    """Write JSON via a temp file + rename, like atomic_save"""
+    text = json.dumps(obj, indent=2, ensure_ascii=False) + '\n'
+    atomic_write_bytes(text.encode('utf-8'), path)
+
+def load_manifest(path):
+    """A JSON manifest written by atomic_write_json, or {} if it is missing or unreadable"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def run_tasks(func, tasks, jobs=1):
+    """
+    Run func on each task, in a process pool when jobs > 1 (func must be
+    picklable). Yields (task, result, None), or (task, None, error) for a
+    task that raised, as each one finishes, so one failure doesn't stop
+    the rest of the batch.
+    """
+    workers = max(1, min(jobs, len(tasks)))
+    if workers <= 1:
+        for task in tasks:
+            try:
+                yield task, func(task), None
+            except Exception as e:
+                yield task, None, e
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, task): task for task in tasks}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            for future in futures:
+                future.cancel()
+
+class TileCache:
+    """Rendered images stored as PNG under <cache_dir>/<key[:2]>/<key>.png"""
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+    
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.png'
+    
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                return img.copy()
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, key, img):
+        atomic_save(img, self._path(key), compress_level=1)
@@ -0,0 +1,115 @@
+"""
+Sheet Packing Planner
+Chooses how to arrange cards on a sheet - upright, rotated, or a mix of
+both - to fit the most cards per page within margins, gutters and crop marks
+"""
+
+CROP_MARK_COLOR = '#666666'
+
+def _grid(avail_w, avail_h, w, h, gutter):
+    """Columns and rows of w x h cards that fit in an area"""
+    if avail_w < w or avail_h < h:
+        return 0, 0
+    return int((avail_w + gutter) // (w + gutter)), int((avail_h + gutter) // (h + gutter))
+
+def _block(x0, y0, cols, rows, w, h, gutter, rotated):
+    return [(x0 + c * (w + gutter), y0 + r * (h + gutter), rotated)
+            for r in range(rows) for c in range(cols)]
+
+def _candidates(x0, y0, avail_w, avail_h, card_w, card_h, gutter, allow_rotation):
+    """Yield (description, slots) for every arrangement worth comparing"""
+    orientations = [(card_w, card_h, False)]
+    if allow_rotation and card_w != card_h:
+        orientations.append((card_h, card_w, True))
+    
+    # Uniform grids first, so ties keep the simplest arrangement
+    for w, h, rotated in orientations:
+        cols, rows = _grid(avail_w, avail_h, w, h, gutter)
+        name = 'rotated' if rotated else 'upright'
+        yield f"{cols}×{rows} {name}", _block(x0, y0, cols, rows, w, h, gutter, rotated)
+    
+    if len(orientations) < 2:
+        return
+    
+    # Mixed: a block of one orientation, the leftover strip filled with the other
+    upright, turned = orientations
+    for (w, h, rotated), (ow, oh, o_rotated) in ((upright, turned), (turned, upright)):
+        cols, rows = _grid(avail_w, avail_h, w, h, gutter)
+        name, o_name = ('rotated', 'upright') if rotated else ('upright', 'rotated')
+        
+        for r in range(1, rows):
+            used = r * (h + gutter)
+            o_cols, o_rows = _grid(avail_w, avail_h - used, ow, oh, gutter)
+            if o_cols * o_rows:
+                slots = (_block(x0, y0, cols, r, w, h, gutter, rotated)
+                         + _block(x0, y0 + used, o_cols, o_rows, ow, oh, gutter, o_rotated))
+                yield f"{cols}×{r} {name} + {o_cols}×{o_rows} {o_name}", slots
+        
+        for c in range(1, cols):
+            used = c * (w + gutter)
+            o_cols, o_rows = _grid(avail_w - used, avail_h, ow, oh, gutter)
+            if o_cols * o_rows:
+                slots = (_block(x0, y0, c, rows, w, h, gutter, rotated)
+                         + _block(x0 + used, y0, o_cols, o_rows, ow, oh, gutter, o_rotated))
+                yield f"{c}×{rows} {name} | {o_cols}×{o_rows} {o_name}", slots
+
+def plan_sheet(page_w, page_h, margin, card_w, card_h, gutter=0, allow_rotation=True,
+               crop_marks=False, crop_mark_len=0):
+    """
+    Plan card placement on one sheet (all sizes in pixels).
+    
+    Returns a dict with 'slots' [(x, y, rotated), ...] in fill order,
+    'per_page', a human-readable 'description', and 'baseline_per_page'
+    for the fixed upright grid with no gutter the generator used to use.
+    Crop marks need room outside the cards, so the margin is widened to
+    fit them if it is smaller.
+    """
+    baseline_cols, baseline_rows = _grid(page_w - 2 * margin, page_h - 2 * margin, card_w, card_h, 0)
+    
+    edge = max(margin, crop_mark_len) if crop_marks else margin
+    avail_w = page_w - 2 * edge
+    avail_h = page_h - 2 * edge
+    
+    best_desc, best_slots = '0 cards', []
+    for desc, slots in _candidates(edge, edge, avail_w, avail_h, card_w, card_h, gutter, allow_rotation):
+        rotated = sum(1 for s in slots if s[2])
+        best_rotated = sum(1 for s in best_slots if s[2])
+        if len(slots) > len(best_slots) or (len(slots) == len(best_slots) and rotated < best_rotated):
+            best_desc, best_slots = desc, slots
+    
+    return {
+        'slots': best_slots,
+        'per_page': len(best_slots),
+        'description': best_desc,
+        'baseline_per_page': baseline_cols * baseline_rows,
+    }
+
+def slot_size(card_w, card_h, rotated):
+    return (card_h, card_w) if rotated else (card_w, card_h)
+
+def draw_crop_marks(draw, slots, card_w, card_h, length, offset=None, color=CROP_MARK_COLOR):
+    """
+    Draw cut guides at each card corner, pointing away from the card.
+    Marks that would run into another card are skipped.
+    """
+    offset = max(2, length // 6) if offset is None else offset
+    rects = []
+    for x, y, rotated in slots:
+        w, h = slot_size(card_w, card_h, rotated)
+        rects.append((x, y, x + w, y + h))
+    
+    def hits_card(x1, y1, x2, y2, own):
+        return any(i != own and x1 <= r[2] and x2 >= r[0] and y1 <= r[3] and y2 >= r[1]
+                   for i, r in enumerate(rects))
+    
+    for i, (left, top, right, bottom) in enumerate(rects):
+        for cx, dx in ((left, -1), (right, 1)):
+            for cy, dy in ((top, -1), (bottom, 1)):
+                # Horizontal mark level with the card edge, outside the card
+                hx1, hx2 = sorted((cx + dx * offset, cx + dx * (offset + length)))
+                if not hits_card(hx1, cy, hx2, cy, i):
+                    draw.line([(hx1, cy), (hx2, cy)], fill=color, width=1)
+                # Vertical mark
+                vy1, vy2 = sorted((cy + dy * offset, cy + dy * (offset + length)))
+                if not hits_card(cx, vy1, cx, vy2, i):
+                    draw.line([(cx, vy1), (cx, vy2)], fill=color, width=1)
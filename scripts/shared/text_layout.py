@@ -0,0 +1,144 @@
+"""
+Pixel-Width Text Layout
+Wraps text by measured advance width instead of character count, with
+per-font glyph/word width caches so repeated words cost a dict lookup
+"""
+
+import threading
+
+class FontMetrics:
+    """Cached advance widths and line height for one font"""
+    
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}
+        self._words = {}
+        self.space_width = font.getlength(' ')
+        if hasattr(font, 'getmetrics'):
+            ascent, descent = font.getmetrics()
+            self.line_height = ascent + descent
+        else:
+            # PIL's bitmap default font has no metrics
+            bbox = font.getbbox('Ay')
+            self.line_height = bbox[3] - bbox[1] + 2
+    
+    def glyph_width(self, char):
+        width = self._glyphs.get(char)
+        if width is None:
+            width = self._glyphs[char] = self.font.getlength(char)
+        return width
+    
+    def word_width(self, word):
+        width = self._words.get(word)
+        if width is None:
+            width = self._words[word] = self.font.getlength(word)
+        return width
+    
+    def line_width(self, words):
+        return sum(self.word_width(w) for w in words) + self.space_width * (len(words) - 1)
+    
+    def wrap(self, text, max_width):
+        """Wrap text into lines no wider than max_width; returns [(line, width), ...]"""
+        lines = []
+        for paragraph in text.split('\n'):
+            line = []
+            line_w = 0
+            for word in paragraph.split():
+                word_w = self.word_width(word)
+                if word_w > max_width:
+                    # Too long for any line - break it by glyph
+                    if line:
+                        lines.append((' '.join(line), line_w))
+                    pieces = self._split_word(word, max_width)
+                    lines.extend(pieces[:-1])
+                    last, last_w = pieces[-1]
+                    line, line_w = [last], last_w
+                    continue
+                
+                new_w = line_w + self.space_width + word_w if line else word_w
+                if new_w <= max_width:
+                    line.append(word)
+                    line_w = new_w
+                else:
+                    lines.append((' '.join(line), line_w))
+                    line, line_w = [word], word_w
+            if line:
+                lines.append((' '.join(line), line_w))
+        return lines
+    
+    def _split_word(self, word, max_width):
+        pieces = []
+        piece = ''
+        piece_w = 0
+        for char in word:
+            char_w = self.glyph_width(char)
+            if piece and piece_w + char_w > max_width:
+                pieces.append((piece, piece_w))
+                piece, piece_w = '', 0
+            piece += char
+            piece_w += char_w
+        pieces.append((piece, piece_w))
+        return pieces
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+def font_metrics(font):
+    """Return the shared FontMetrics for a font (one per font file and size)"""
+    path = getattr(font, 'path', None)
+    key = (path, font.size) if path else id(font)
+    metrics = _metrics.get(key)
+    if metrics is None:
+        with _metrics_lock:
+            metrics = _metrics.setdefault(key, FontMetrics(font))
+    return metrics
+
+class TextBlock:
+    """Result of fitting text into a box"""
+    
+    def __init__(self, font, lines, line_height, truncated=False):
+        self.font = font
+        self.lines = lines
+        self.line_height = line_height
+        self.truncated = truncated
+    
+    @property
+    def height(self):
+        return len(self.lines) * self.line_height
+    
+    def draw_centered(self, draw, center_x, top, fill):
+        """Draw each line centred on center_x; returns the y below the block"""
+        y = top
+        for line, width in self.lines:
+            draw.text((center_x - int(width) // 2, y), line, fill=fill, font=self.font)
+            y += self.line_height
+        return y
+
+def layout_text(text, font, max_width, line_spacing=1.0):
+    metrics = font_metrics(font)
+    line_height = int(round(metrics.line_height * line_spacing))
+    return TextBlock(font, metrics.wrap(text, max_width), line_height)
+
+def fit_text(text, box_w, box_h, get_font, max_size, min_size=6, line_spacing=1.0):
+    """
+    Lay out text at the largest font size in [min_size, max_size] that fits
+    the box, found by binary search. get_font(size) returns a font; if even
+    min_size overflows, lines are cut to what fits.
+    """
+    best = None
+    lo, hi = min_size, max_size
+    while lo <= hi:
+        size = (lo + hi) // 2
+        block = layout_text(text, get_font(size), box_w, line_spacing)
+        if block.height <= box_h:
+            best = block
+            lo = size + 1
+        else:
+            hi = size - 1
+    
+    if best is None:
+        best = layout_text(text, get_font(min_size), box_w, line_spacing)
+        max_lines = max(0, box_h // best.line_height) if best.line_height else 0
+        best.lines = best.lines[:max_lines]
+        best.truncated = True
+    return best
@@ -29,8 +29,6 @@ PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(PROJECT_DIR, 'data', 'book')
 OUTPUT_DIR = os.path.join(PROJECT_DIR, 'to_print')
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 # All chapters in order - titles derived from JSON filenames
 CHAPTERS = [
     ('00_prologue.json', 'Prologue'),
@@ -135,6 +133,7 @@ def generate_book_pdf():
     """Generate a complete, book-style PDF."""
     
     # Create PDF with book-like margins
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     pdf_path = os.path.join(OUTPUT_DIR, 'Murder_Mystery_Book.pdf')
     
     # Book-like page setup with larger margins
@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 """
 Clue Examples PDF Generator for Murder Mystery Game
-Creates a reference PDF with 2 example QR codes for each clue type
+Creates a reference PDF with 2 example QR codes for each clue type, or
+with --catalog the game master's full catalog: every QR in qr_codes/,
+grouped by type and labelled from the data files
 """
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+import json
 import math
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.fonts import get_font
+from shared.qr import qr_image, qr_url_for, qrcode_available
+from shared.pdf_writer import PAGE_MODES, PDFPageWriter, canvas_mode, encode_page, reduce_page
 
 # Clue types with their examples (type_name, display_name, [(qr_file, label), ...])
 CLUE_TYPES = [
@@ -32,7 +45,18 @@ CLUE_TYPES = [
     ]),
 ]
 
-def create_clue_examples_pdf(output_file="clue_examples.pdf"):
+# Catalog sections in page order: QR file prefix, heading, and the data
+# file (and list key) the labels come from. Prefixes not listed here get a
+# section of their own after these, labelled from their file names.
+CATALOG_SECTIONS = [
+    ("vision", "Visions (Ghost Manifestations)", "visions.json", "visions"),
+    ("botanical", "Botanical Clues", "botanical.json", "botanical"),
+    ("document", "Documents (Legal & Financial)", "documents.json", "documents"),
+    ("journal", "Journals (Personal Diaries)", "journals.json", "journals"),
+    ("artifact", "Artifacts (Physical Objects)", "artifacts.json", "artifacts"),
+]
+
+def create_clue_examples_pdf(output_file="clue_examples.pdf", page_mode='RGB'):
     """
     Create a PDF with example QR codes organized by clue type.
     
@@ -41,6 +65,9 @@ def create_clue_examples_pdf(output_file="clue_examples.pdf"):
     - Each clue type gets a section with header
     - 2 QR codes per type side by side
     - 1920s mystery style
+    
+    page_mode 'L' or '1' renders grayscale / black-and-white pages,
+    'auto' stores each page in the smallest mode that loses nothing.
     """
     
     # Page settings
@@ -80,30 +107,20 @@ def create_clue_examples_pdf(output_file="clue_examples.pdf"):
     # Calculate number of pages
     num_pages = math.ceil(len(CLUE_TYPES) / sections_per_page)
     
-    # Create pages
+    # Load fonts once for all pages
+    title_font = get_font('serif', 28)
+    header_font = get_font('serif', 20)
+    label_font = get_font('serif', 14)
+    
+    # Create pages, compressed as soon as each one is drawn
     pages = []
     section_index = 0
     
     for page_num in range(1, num_pages + 1):
         # Create new page image
-        page_img = Image.new('RGB', (page_width_px, page_height_px), color='white')
+        page_img = Image.new(canvas_mode(page_mode), (page_width_px, page_height_px), color='white')
         draw = ImageDraw.Draw(page_img)
         
-        # Load fonts
-        try:
-            title_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 28)
-            header_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 20)
-            label_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 14)
-        except:
-            try:
-                title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-                header_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)
-                label_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-            except:
-                title_font = ImageFont.load_default()
-                header_font = ImageFont.load_default()
-                label_font = ImageFont.load_default()
-        
         # Page title (only on first page)
         current_y = margin_px
         if page_num == 1:
@@ -159,9 +176,16 @@ def create_clue_examples_pdf(output_file="clue_examples.pdf"):
                 # Load and paste QR code
                 qr_path = Path(f"qr_codes/{qr_file}")
                 if qr_path.exists():
-                    qr = Image.open(qr_path)
-                    qr = qr.resize((qr_size_px, qr_size_px), Image.Resampling.LANCZOS)
-                    page_img.paste(qr, (qr_x, qr_y))
+                    qr_url = qr_url_for(qr_path) if qrcode_available() else None
+                    if qr_url:
+                        # Drawn from its URL at whole pixels per module, centred in the square
+                        qr = qr_image(qr_url, qr_size_px)
+                        offset = (qr_size_px - qr.width) // 2
+                        page_img.paste(qr, (qr_x + offset, qr_y + offset))
+                    else:
+                        with Image.open(qr_path) as qr_src:
+                            qr = qr_src.resize((qr_size_px, qr_size_px), Image.Resampling.LANCZOS)
+                        page_img.paste(qr, (qr_x, qr_y))
                     
                     # Draw border around QR
                     draw.rectangle(
@@ -191,11 +215,16 @@ def create_clue_examples_pdf(output_file="clue_examples.pdf"):
             current_y += qr_row_height + 20
             section_index += 1
         
-        pages.append(page_img)
+        stored = reduce_page(page_img, page_mode)
+        pages.append(encode_page(stored))
+        stored.close()
+        page_img.close()
     
     # Save as PDF
     if pages:
-        pages[0].save(output_file, save_all=True, append_images=pages[1:])
+        with PDFPageWriter(output_file, resolution=dpi) as writer:
+            for page in pages:
+                writer.add_encoded(page)
         
         print(f"\n{'='*60}")
         print(f"✅ PDF successfully created!")
@@ -211,6 +240,258 @@ def create_clue_examples_pdf(output_file="clue_examples.pdf"):
         print(f"❌ Error: No pages created")
         return False
 
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+def load_catalog_labels(data_dir="data"):
+    """{prefix: {id: label}} from the data files, ids normalised like QR file names"""
+    labels = {}
+    for prefix, _, filename, key in CATALOG_SECTIONS:
+        data_file = Path(data_dir) / filename
+        if not data_file.exists():
+            print(f"  ⚠️  Missing data file: {data_file}")
+            continue
+        with open(data_file, encoding='utf-8') as f:
+            items = json.load(f).get(key, [])
+        labels[prefix] = {
+            _slug(item.get('id') or item.get('ghost') or ''): item.get('name') or item.get('title')
+            for item in items if (item.get('id') or item.get('ghost')) and (item.get('name') or item.get('title'))
+        }
+    return labels
+
+def catalog_label(prefix, rest, labels):
+    """
+    Label for qr_codes/<prefix>_<rest>.png. The data ids and file names
+    don't always agree (botanical_foxglove vs foxglove_poison), so the one
+    id that starts with the name also counts. Falls back to the file name.
+    """
+    owner = None
+    if prefix == 'journal':
+        owner, _, rest = rest.partition('_')
+    name = _slug(rest)
+    known = labels.get(prefix, {})
+    if name in known:
+        return known[name]
+    matches = [i for i in known if i.startswith(name + '_')]
+    if len(matches) == 1:
+        return known[matches[0]]
+    title = name.replace('_', ' ').title()
+    if owner and not name.startswith(owner + '_'):
+        return f"{owner.title()}: {title}"
+    return title
+
+def catalog_clue_key(qr_path, prefix, rest):
+    """
+    What a PNG is a code for: the page its URL opens, with - and _ treated
+    alike, so the hand-made artifact_blood-specs.png and a generated
+    artifact_blood_specs.png (or journal_cordelia_diary.png next to
+    journal_cordelia_cordelia_diary.png) count as one clue
+    """
+    url = qr_url_for(qr_path)
+    page = url.rsplit('/', 1)[-1].rsplit('.', 1)[0] if url else rest
+    return prefix, re.sub(r'[-_]+', '_', page.lower())
+
+def discover_catalog(qr_dir="qr_codes", data_dir="data"):
+    """
+    [(heading, [(qr_path, label), ...])] for every clue with a QR PNG, known
+    sections first; of several PNGs for the same clue only the first (by
+    file name) is listed
+    """
+    labels = load_catalog_labels(data_dir)
+    groups = {}
+    seen = set()
+    for qr_path in sorted(Path(qr_dir).glob('*.png')):
+        prefix, _, rest = qr_path.stem.partition('_')
+        if not rest:
+            continue
+        key = catalog_clue_key(qr_path, prefix, rest)
+        if key in seen:
+            continue
+        seen.add(key)
+        groups.setdefault(prefix, []).append((str(qr_path), catalog_label(prefix, rest, labels)))
+    
+    headings = {prefix: heading for prefix, heading, _, _ in CATALOG_SECTIONS}
+    order = [prefix for prefix, _, _, _ in CATALOG_SECTIONS if prefix in groups]
+    order += sorted(prefix for prefix in groups if prefix not in headings)
+    return [(headings.get(prefix, f"{prefix.title()}s"), groups[prefix]) for prefix in order]
+
+def _wrap_label(draw, label, font, width, max_lines=2):
+    """Label words in at most max_lines lines of width, the last cut with an ellipsis"""
+    lines = []
+    words = label.split()
+    while words and len(lines) < max_lines:
+        line = words.pop(0)
+        while words and draw.textlength(f"{line} {words[0]}", font=font) <= width:
+            line += f" {words.pop(0)}"
+        lines.append(line)
+    if words or (lines and draw.textlength(lines[-1], font=font) > width):
+        last = lines[-1]
+        while last and draw.textlength(last + "…", font=font) > width:
+            last = last[:-1]
+        lines[-1] = last.rstrip() + "…"
+    return lines
+
+_tile_fonts = {}
+
+def _init_tile_worker():
+    _tile_fonts['label'] = get_font('serif', 13)
+
+def _render_tile(task):
+    """Worker: one catalog tile - the QR (redrawn from its URL when possible) with its label below"""
+    qr_file, label, qr_size, tile_width, tile_height, mode = task
+    font = _tile_fonts.get('label') or get_font('serif', 13)
+    tile = Image.new(mode, (tile_width, tile_height), color='white')
+    draw = ImageDraw.Draw(tile)
+    qr_x = (tile_width - qr_size) // 2
+    
+    qr_url = qr_url_for(qr_file) if qrcode_available() else None
+    if qr_url:
+        qr = qr_image(qr_url, qr_size)
+        offset = (qr_size - qr.width) // 2
+        tile.paste(qr, (qr_x + offset, offset))
+    else:
+        with Image.open(qr_file) as qr_src:
+            qr = qr_src.convert(mode).resize((qr_size, qr_size), Image.Resampling.LANCZOS)
+        tile.paste(qr, (qr_x, 0))
+    draw.rectangle([qr_x - 1, 0, qr_x + qr_size, qr_size - 1], outline='#1a1a1a', width=1)
+    
+    label_y = qr_size + 6
+    for line in _wrap_label(draw, label, font, tile_width - 8):
+        line_width = draw.textlength(line, font=font)
+        draw.text(((tile_width - line_width) // 2, label_y), line, fill='#1a1a1a', font=font)
+        label_y += 16
+    return tile
+
+def _render_tiles(tasks, jobs):
+    workers = max(1, min(jobs, len(tasks)))
+    if workers <= 1:
+        _init_tile_worker()
+        yield from map(_render_tile, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_tile_worker) as pool:
+        yield from pool.map(_render_tile, tasks, chunksize=8)
+
+def create_clue_catalog_pdf(output_file="clue_catalog.pdf", page_mode='RGB', qr_dir="qr_codes",
+                            data_dir="data", jobs=1):
+    """
+    Create the full clue catalog: every QR in qr_dir, in sections by type
+    (see CATALOG_SECTIONS), 1.25" codes five to a row, sections running
+    on from one page to the next. Tiles are rendered in a process pool.
+    """
+    
+    # Page settings
+    page_width = 8.5
+    page_height = 11.0
+    margin = 0.5
+    dpi = 150
+    columns = 5
+    
+    page_width_px = int(page_width * dpi)
+    page_height_px = int(page_height * dpi)
+    margin_px = int(margin * dpi)
+    usable_width = page_width_px - 2 * margin_px
+    
+    qr_size_px = int(1.25 * dpi)
+    tile_width = usable_width // columns
+    tile_height = qr_size_px + 46  # QR + two label lines
+    row_height = tile_height + 10
+    section_header_height = 34
+    mode = canvas_mode(page_mode)
+    
+    start = time.perf_counter()
+    sections = discover_catalog(qr_dir, data_dir)
+    total = sum(len(entries) for _, entries in sections)
+    
+    print(f"\n{'='*60}")
+    print(f"Clue Catalog PDF Generator - 1920s Mystery Style")
+    print(f"{'='*60}")
+    print(f"Page size: {page_width}\" x {page_height}\"")
+    print(f"QR codes: {total} in {len(sections)} sections from {qr_dir}/")
+    print(f"{'='*60}\n")
+    
+    if not total:
+        print(f"❌ Error: No QR codes found in {qr_dir}/")
+        return False
+    
+    title_font = get_font('serif', 28)
+    header_font = get_font('serif', 18)
+    
+    tasks = [(qr_file, label, qr_size_px, tile_width, tile_height, mode)
+             for _, entries in sections for qr_file, label in entries]
+    tiles = _render_tiles(tasks, jobs)
+    
+    pages = 0
+    page_img = draw = None
+    current_y = page_bottom = 0
+    
+    def new_page():
+        nonlocal page_img, draw, current_y, page_bottom
+        page_img = Image.new(mode, (page_width_px, page_height_px), color='white')
+        draw = ImageDraw.Draw(page_img)
+        current_y = margin_px
+        page_bottom = page_height_px - margin_px
+        if pages == 0:
+            page_title = "CLUE CATALOG"
+            title_bbox = draw.textbbox((0, 0), page_title, font=title_font)
+            draw.text(((page_width_px - (title_bbox[2] - title_bbox[0])) // 2, current_y),
+                      page_title, fill='#1a1a1a', font=title_font)
+            current_y += 50
+            line_start = margin_px + 50
+            line_end = page_width_px - margin_px - 50
+            draw.line([(line_start, current_y), (line_end, current_y)], fill='#2a2a2a', width=2)
+            draw.ellipse([(line_start - 4, current_y - 3), (line_start + 4, current_y + 3)], fill='#2a2a2a')
+            draw.ellipse([(line_end - 4, current_y - 3), (line_end + 4, current_y + 3)], fill='#2a2a2a')
+            current_y += 25
+    
+    def section_header(text):
+        nonlocal current_y
+        draw.rectangle([margin_px, current_y, page_width_px - margin_px, current_y + section_header_height],
+                       fill='#2a2a2a')
+        header_bbox = draw.textbbox((0, 0), text, font=header_font)
+        draw.text(((page_width_px - (header_bbox[2] - header_bbox[0])) // 2, current_y + 7),
+                  text, fill='#d4a574', font=header_font)
+        current_y += section_header_height + 12
+    
+    with PDFPageWriter(output_file, resolution=dpi) as writer:
+        def finish_page():
+            nonlocal pages
+            stored = reduce_page(page_img, page_mode)
+            writer.add_encoded(encode_page(stored))
+            if stored is not page_img:
+                stored.close()
+            page_img.close()
+            pages += 1
+        
+        new_page()
+        for heading, entries in sections:
+            rows = [entries[i:i + columns] for i in range(0, len(entries), columns)]
+            # A heading never ends a page on its own
+            if current_y + section_header_height + 12 + row_height > page_bottom:
+                finish_page()
+                new_page()
+            section_header(heading.upper())
+            for row in rows:
+                if current_y + row_height > page_bottom:
+                    finish_page()
+                    new_page()
+                    section_header(f"{heading.upper()} (CONTINUED)")
+                for column, _ in enumerate(row):
+                    page_img.paste(next(tiles), (margin_px + column * tile_width, current_y))
+                current_y += row_height
+            current_y += 10
+            print(f"  ✓ {heading} ({len(entries)})")
+        finish_page()
+    
+    elapsed = time.perf_counter() - start
+    print(f"\n{'='*60}")
+    print(f"✅ PDF successfully created!")
+    print(f"{'='*60}")
+    print(f"📄 Filename: {output_file}")
+    print(f"📊 Total pages: {pages}")
+    print(f"📦 QR codes: {total} in {elapsed:.1f}s")
+    print(f"{'='*60}\n")
+    return True
+
 def main():
     """Main entry point"""
     import argparse
@@ -222,10 +503,42 @@ def main():
         default="clue_examples.pdf",
         help="Output PDF filename (default: clue_examples.pdf)"
     )
+    parser.add_argument(
+        "--page-mode",
+        choices=PAGE_MODES,
+        default="RGB",
+        help="Page colour mode: RGB, L (gray), 1 (black/white) or auto (default: RGB)"
+    )
+    
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        help="Every QR in qr_codes/ grouped by type instead of two examples each"
+    )
+    parser.add_argument(
+        "--qr-dir",
+        default="qr_codes",
+        help="With --catalog: directory of QR PNGs (default: qr_codes)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="With --catalog: data files the labels come from (default: data)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="With --catalog: worker processes for the tiles (default: CPU count)"
+    )
     
     args = parser.parse_args()
     
-    success = create_clue_examples_pdf(args.output)
+    if args.catalog:
+        output = args.output if args.output != "clue_examples.pdf" else "clue_catalog.pdf"
+        success = create_clue_catalog_pdf(output, args.page_mode, args.qr_dir, args.data_dir, args.jobs)
+    else:
+        success = create_clue_examples_pdf(args.output, args.page_mode)
     exit(0 if success else 1)
 
 if __name__ == "__main__":
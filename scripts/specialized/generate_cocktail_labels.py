@@ -2,9 +2,15 @@
 """
 Generate cocktail labels for Eternal Love Elixir (alcoholic and non-alcoholic)
 in Sebastian's alchemical elixir style
+Label images are generated concurrently and cached by prompt, so only a changed
+prompt costs a generation; --layout-only rebuilds the PDF from the cached images
+without loading the Gemini SDK
 """
 
 import os
+import sys
+import time
+import argparse
 from pathlib import Path
 from PIL import Image
 
@@ -14,7 +20,6 @@ try:
 except ImportError:
     pass
 
-import google.generativeai as genai
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
@@ -28,21 +33,24 @@ OUTPUT_DIR = os.path.join(PROJECT_DIR, 'to_print')
 os.makedirs(IMAGES_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def generate_cocktail_labels():
-    """Generate two cocktail label images using Gemini"""
-    
-    api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key or api_key == 'your_gemini_api_key_here':
-        print("❌ Gemini API key not found. Please set GEMINI_API_KEY environment variable.")
-        return None, None
-    
-    genai.configure(api_key=api_key)
-    
-    labels = [
-        {
-            'id': 'eternal_love_elixir_alcoholic',
-            'filename': 'eternal_love_elixir_alcoholic.png',
-            'prompt': """Create an ornate vintage cocktail bottle label for "Eternal Love Elixir" (contains alcohol).
+sys.path.insert(0, PROJECT_DIR)
+from shared.image_batch import BACKENDS, DEFAULT_MODEL, run_batch
+from shared.generation_cache import GenerationCache, generation_key
+from shared.render_cache import (CACHE_ROOT, atomic_save, atomic_write_json, content_key, file_fingerprint,
+                                 load_manifest)
+from shared.batch_journal import file_sha256
+
+LABEL_MODEL = DEFAULT_MODEL
+PRINT_READY_DIR = CACHE_ROOT / 'cocktail_labels'
+PRINT_DPI = 300
+# label file name -> {key, sha256} of the cache entry last exported there
+EXPORTS_MANIFEST = os.path.join(IMAGES_DIR, 'manifest.json')
+
+LABELS = [
+    {
+        'id': 'eternal_love_elixir_alcoholic',
+        'filename': 'eternal_love_elixir_alcoholic.png',
+        'prompt': """Create an ornate vintage cocktail bottle label for "Eternal Love Elixir" (contains alcohol).
 
 The label should have:
 - Ornate parchment background in cream, gold, and deep burgundy tones
@@ -57,11 +65,11 @@ The label should have:
 - Aged, mystical appearance with gold accents
 - Include text: "Distilled with Intent | For Eternal Love"
 - Professional vintage label design, high detail"""
-        },
-        {
-            'id': 'eternal_love_elixir_nonalcoholic',
-            'filename': 'eternal_love_elixir_nonalcoholic.png',
-            'prompt': """Create an ornate vintage cocktail bottle label for "Eternal Love Elixir" (non-alcoholic).
+    },
+    {
+        'id': 'eternal_love_elixir_nonalcoholic',
+        'filename': 'eternal_love_elixir_nonalcoholic.png',
+        'prompt': """Create an ornate vintage cocktail bottle label for "Eternal Love Elixir" (non-alcoholic).
 
 The label should have:
 - Ornate parchment background in soft rose, cream, and gold tones
@@ -76,37 +84,104 @@ The label should have:
 - Mystical, romantic appearance with rose gold accents
 - Include text: "Crafted with Care | For All Who Seek Love"
 - Professional vintage label design, high detail"""
-        }
-    ]
-    
-    generated_paths = []
+    }
+]
+
+def label_path(label):
+    return os.path.join(IMAGES_DIR, label['filename'])
+
+def label_key(label, backend_name='gemini'):
+    return generation_key(label['prompt'], LABEL_MODEL, backend=backend_name)
+
+def export_label(cache, key, label, exports, force=False):
+    """
+    Copy the cache entry for key to the label's image unless it is already
+    there. A label image that isn't what was last exported (retouched by
+    hand) is kept unless force. Records the export in exports.
+    """
+    path = label_path(label)
+    recorded = exports.get(label['filename'], {})
+    if os.path.exists(path):
+        current = file_sha256(path)
+        if current == file_sha256(cache.get(key)):
+            exports[label['filename']] = {'key': key, 'sha256': current}
+            return
+        if not force and recorded.get('sha256') != current:
+            print(f"✋ Kept {label['filename']}: changed since it was exported (--force to replace)")
+            return
+    cache.export(key, path)
+    exports[label['filename']] = {'key': key, 'sha256': file_sha256(path)}
+
+def generate_cocktail_labels(force=False, backend=None, cache=None):
+    """
+    Generate the cocktail label images using Gemini, all at once, reusing
+    cached images for prompts that haven't changed (unless force).
+    Returns the paths of the labels that are ready, in LABELS order.
+    """
+    cache = cache or GenerationCache()
+    backend = backend or BACKENDS['gemini']()
+    exports = load_manifest(EXPORTS_MANIFEST)
+    pending = []
+    for label in LABELS:
+        if not force and cache.get(label_key(label, backend.name)):
+            export_label(cache, label_key(label, backend.name), label, exports)
+            print(f"♻️  Cached: {label['id']}")
+        else:
+            pending.append(label)
     
-    for label in labels:
-        img_path = os.path.join(IMAGES_DIR, label['filename'])
+    if pending:
+        problem = backend.available()
+        if problem:
+            print(f"❌ {problem}")
+            return []
+        
+        def handle(job, data):
+            cache.put(job['key'], data, prompt=job['prompt'], model=job['model'], params=None)
+            export_label(cache, job['key'], job['label'], exports, force)
+            return job['output']
         
-        try:
+        jobs = [{'prompt': label['prompt'], 'model': LABEL_MODEL, 'key': label_key(label, backend.name),
+                 'output': label_path(label), 'id': label['id'], 'label': label} for label in pending]
+        for label in pending:
             print(f"🎨 Generating {label['id']}...")
-            model = genai.GenerativeModel('gemini-2.5-flash-image')
-            response = model.generate_content([label['prompt']])
-            
-            if response and response.parts:
-                for part in reversed(response.parts):
-                    if hasattr(part, 'inline_data') and part.inline_data.data and len(part.inline_data.data) > 0:
-                        image_data = part.inline_data.data
-                        with open(img_path, 'wb') as f:
-                            f.write(image_data)
-                        print(f"✅ Label created: {img_path}")
-                        generated_paths.append(img_path)
-                        break
+        for result in run_batch(jobs, backend, handle, workers=len(jobs)):
+            if result['status'] == 'done':
+                print(f"✅ Label created: {result['output']} ({result['seconds']:.1f}s)")
             else:
-                print(f"❌ No image data found for {label['id']}")
-                
-        except Exception as e:
-            print(f"❌ Error generating {label['id']}: {e}")
-            import traceback
-            traceback.print_exc()
+                print(f"❌ Error generating {result['job']['id']}: {result['error']}")
     
-    return generated_paths
+    atomic_write_json(exports, EXPORTS_MANIFEST)
+    return [label_path(label) for label in LABELS if os.path.exists(label_path(label))]
+
+def cached_label_paths(cache=None):
+    """Label images already on disk or in the generation cache - no generation, no SDK"""
+    cache = cache or GenerationCache()
+    exports = load_manifest(EXPORTS_MANIFEST)
+    paths = []
+    for label in LABELS:
+        if cache.get(label_key(label)):
+            export_label(cache, label_key(label), label, exports)
+        if os.path.exists(label_path(label)):
+            paths.append(label_path(label))
+        else:
+            print(f"⚠️  No image for {label['id']} yet - run without --layout-only first")
+    atomic_write_json(exports, EXPORTS_MANIFEST)
+    return paths
+
+def print_ready(image_path, width, height, dpi=PRINT_DPI):
+    """
+    The image resized to width x height points at dpi, as a JPEG cached
+    under .cache/ - reportlab embeds JPEGs as they are, where a full-size
+    PNG is decoded and recompressed on every build.
+    """
+    size = (round(width / 72 * dpi), round(height / 72 * dpi))
+    key = content_key([file_fingerprint([image_path]), size])
+    path = PRINT_READY_DIR / f"{key}.jpg"
+    if not path.exists():
+        with Image.open(image_path) as img:
+            atomic_save(img.convert('RGB').resize(size, Image.Resampling.LANCZOS), path,
+                        quality=92, dpi=(dpi, dpi))
+    return str(path)
 
 def create_labels_pdf(label_paths):
     """Create PDF with both cocktail labels"""
@@ -139,9 +214,6 @@ def create_labels_pdf(label_paths):
         for idx, label_path in enumerate(label_paths[:2]):
             try:
                 if Path(label_path).exists():
-                    # Open and check image dimensions
-                    img = Image.open(label_path)
-                    
                     # Calculate position
                     if idx == 0:
                         y_pos = y1
@@ -151,7 +223,8 @@ def create_labels_pdf(label_paths):
                         label_name = "Non-Alcoholic"
                     
                     # Draw the label image
-                    c.drawImage(label_path, x_center, y_pos, width=label_width, height=label_height)
+                    c.drawImage(print_ready(label_path, label_width, label_height),
+                                x_center, y_pos, width=label_width, height=label_height)
                     
                     # Add label text below image
                     c.setFont("Helvetica", 10)
@@ -166,19 +239,31 @@ def create_labels_pdf(label_paths):
         c.save()
         print(f"✅ PDF created: {pdf_path}")
         return True
-        
+    
     except Exception as e:
         print(f"❌ Error creating PDF: {e}")
         import traceback
         traceback.print_exc()
         return False
 
-if __name__ == '__main__':
+def main():
+    parser = argparse.ArgumentParser(description="Generate Eternal Love Elixir cocktail labels")
+    parser.add_argument("--layout-only", action="store_true",
+                        help="Rebuild the PDF from the cached label images, without generating")
+    parser.add_argument("--force", action="store_true", help="Regenerate the label images even if cached")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default='gemini',
+                        help="Image backend (stub = offline placeholders)")
+    args = parser.parse_args()
+    
     print("🍸 Generating Eternal Love Elixir Cocktail Labels...")
     print("=" * 60)
+    start = time.perf_counter()
     
-    # Generate label images
-    label_paths = generate_cocktail_labels()
+    if args.layout_only:
+        label_paths = cached_label_paths()
+    else:
+        backend = BACKENDS[args.backend]() if args.backend != 'gemini' else None
+        label_paths = generate_cocktail_labels(force=args.force, backend=backend)
     
     if label_paths and len(label_paths) > 0:
         print("\n" + "=" * 60)
@@ -186,13 +271,13 @@ if __name__ == '__main__':
         create_labels_pdf(label_paths)
         
         print("\n" + "=" * 60)
-        print("✨ Complete!")
+        print(f"✨ Complete! ({time.perf_counter() - start:.2f}s)")
         print(f"   Labels created: {len(label_paths)}")
         print(f"   PDF: to_print/eternal_love_elixir_labels.pdf")
         print("=" * 60)
     else:
         print("❌ Failed to generate labels")
+        sys.exit(1)
 
-
-
-
+if __name__ == '__main__':
+    main()
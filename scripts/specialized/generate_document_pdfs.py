@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Document Handout Generator
+Turns each data/documents/*.json into a styled handout: the document's
+title and text laid out on one or more page images in a template chosen
+from its type (formula, certificate, newspaper or plain record), and a
+PDF with those pages and a QR to the document's page on the site.
+Documents whose JSON, template code and QR target are unchanged since the
+last run are skipped; the rest are rendered in a process pool.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from reportlab.lib.colors import HexColor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.fonts import get_font, resolve_role
+from shared.qr import draw_qr_vector, qr_matrix, qr_url_for, short_link_for
+from shared.render_cache import (atomic_save, atomic_write_json, content_key, file_fingerprint, load_manifest,
+                                 run_tasks, source_fingerprint)
+from shared.batch_journal import file_sha256
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+DOCUMENTS_DIR = PROJECT_DIR / 'data' / 'documents'
+QR_CODES_DIR = PROJECT_DIR / 'qr_codes'
+IMAGES_DIR = PROJECT_DIR / 'images' / 'clue_images_documents'
+OUTPUT_DIR = PROJECT_DIR / 'to_print' / 'documents'
+MANIFEST_NAME = 'manifest.json'
+SHARED_DIR = Path(__file__).resolve().parent.parent / 'shared'
+
+# Page images fill 6" x 7.5" of a letter page at 200 DPI, leaving the
+# bottom right corner for a 2" QR
+IMAGE_WIDTH, IMAGE_HEIGHT = 1200, 1500
+IMAGE_BOX = (6 * inch, 7.5 * inch)
+QR_SIZE = 2 * inch
+QR_ERROR_CORRECTION = 'H'
+QR_BORDER = 2
+
+# Styles a document can be drawn in; a document picks one with a
+# "template" key, else by its type (see template_for)
+TEMPLATES = {
+    'formula': {
+        'background': (30, 25, 20),  # Dark burgundy-brown
+        'accent': (218, 165, 32),  # Gold
+        'text': (245, 245, 220),
+        'muted': (200, 170, 120),
+        'font': 'sans',
+        'title_font': 'sans',
+        'frame': 'double',
+    },
+    'certificate': {
+        'background': '#f4ecd8',
+        'accent': '#5a3e22',
+        'text': '#2a1810',
+        'muted': '#6b5a45',
+        'font': 'serif',
+        'title_font': 'serif',
+        'frame': 'double',
+    },
+    'newspaper': {
+        'background': '#ecebe4',
+        'accent': '#1a1a1a',
+        'text': '#1a1a1a',
+        'muted': '#555555',
+        'font': 'serif',
+        'title_font': 'serif',
+        'frame': 'rules',
+    },
+    'record': {
+        'background': '#f7f3ea',
+        'accent': '#3b3b3b',
+        'text': '#222222',
+        'muted': '#666666',
+        'font': 'serif',
+        'title_font': 'sans',
+        'frame': 'single',
+    },
+}
+
+# Sizes in pixels on the 1200 x 1500 page image
+TITLE_SIZE = 50
+SUBTITLE_SIZE = 26
+BODY_SIZES = (27, 25, 23)
+LINE_SPACING = 1.4
+MARGIN = 100
+
+def template_for(doc):
+    """The document's "template", else newspaper / formula / certificate / record by its fields"""
+    if doc.get('template') in TEMPLATES:
+        return doc['template']
+    if doc.get('headline'):
+        return 'newspaper'
+    kind = f"{doc.get('id', '')} {doc.get('title', '')} {doc.get('type', '')}".lower()
+    if 'formula' in kind:
+        return 'formula'
+    if 'certificate' in kind:
+        return 'certificate'
+    return 'record'
+
+def load_document(path):
+    with open(path, encoding='utf-8') as f:
+        doc = json.load(f)
+    if not isinstance(doc, dict):
+        raise ValueError(f"expected a JSON object, got {type(doc).__name__}")
+    doc.setdefault('id', Path(path).stem)
+    return doc
+
+def document_url(doc_id):
+    """The site page the QR points at - the short /q/ link when one is registered"""
+    url = qr_url_for(QR_CODES_DIR / f"document_{doc_id}.png")
+    return short_link_for(url, QR_CODES_DIR) or url
+
+def wrap_text(draw, text, font, width):
+    """Lines of text no wider than width, breaking between words (or inside one that is too long)"""
+    lines = []
+    line = ''
+    for word in text.split(' '):
+        candidate = f"{line} {word}" if line else word
+        if draw.textlength(candidate, font=font) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        line = word
+        while draw.textlength(line, font=font) > width and len(line) > 1:
+            cut = len(line)
+            while cut > 1 and draw.textlength(line[:cut], font=font) > width:
+                cut -= 1
+            lines.append(line[:cut])
+            line = line[cut:]
+    lines.append(line)
+    return lines
+
+def fit_line(draw, text, font, width, suffix=''):
+    """text + suffix on one line, shortening text with an ellipsis if it doesn't fit in width"""
+    if draw.textlength(text + suffix, font=font) <= width:
+        return text + suffix
+    while text and draw.textlength(f"{text}…{suffix}", font=font) > width:
+        text = text[:-1].rstrip()
+    return f"{text}…{suffix}"
+
+def content_lines(doc, draw, font, width):
+    """
+    (text, style, indent) per printed line of the document's content.
+    "===== X =====" and all-caps titles are headings; leading spaces indent
+    the line and its wrapped continuation.
+    """
+    content = doc.get('content', '') or doc.get('description', '')
+    space = draw.textlength(' ', font=font)
+    lines = []
+    for raw in content.split('\n'):
+        text = raw.rstrip()
+        if not text.strip():
+            lines.append(('', 'blank', 0))
+            continue
+        section = re.fullmatch(r'\s*=+\s*(.*?)\s*=+\s*', text)
+        if section:
+            lines.append((section.group(1), 'heading', 0))
+            continue
+        indent = int((len(text) - len(text.lstrip(' '))) * space)
+        text = text.strip()
+        # "EXTERNAL EXAMINATION:" is a heading, "HOUR OF DEATH: 14:15" isn't
+        caps = re.search(r'[A-Z]', text) and text == text.upper()
+        style = 'heading' if caps and (':' not in text or text.endswith(':')) else 'body'
+        for line in wrap_text(draw, text, font, width - indent):
+            lines.append((line, style, indent))
+    # No blank lines at a page's edges
+    while lines and lines[-1][1] == 'blank':
+        lines.pop()
+    return lines
+
+def _draw_frame(draw, style):
+    w, h = IMAGE_WIDTH, IMAGE_HEIGHT
+    if style['frame'] == 'double':
+        draw.rectangle([40, 40, w - 40, h - 40], outline=style['accent'], width=4)
+        draw.rectangle([52, 52, w - 52, h - 52], outline=style['accent'], width=1)
+    elif style['frame'] == 'single':
+        draw.rectangle([45, 45, w - 45, h - 45], outline=style['accent'], width=2)
+    else:
+        # Newspaper column rules top and bottom
+        draw.line([MARGIN - 30, 60, w - MARGIN + 30, 60], fill=style['accent'], width=4)
+        draw.line([MARGIN - 30, h - 60, w - MARGIN + 30, h - 60], fill=style['accent'], width=4)
+
+def _centered(draw, text, font, y, fill):
+    width = draw.textlength(text, font=font)
+    draw.text(((IMAGE_WIDTH - width) // 2, y), text, fill=fill, font=font)
+
+def paginate(lines, first_top, next_top, line_height):
+    """Split content lines into pages, the first starting at first_top and the rest at next_top"""
+    pages = []
+    lines = list(lines)
+    while True:
+        y = next_top if pages else first_top
+        while lines and lines[0][1] == 'blank':
+            lines.pop(0)
+        page = []
+        while lines and y + line_height <= IMAGE_HEIGHT - MARGIN:
+            line = lines.pop(0)
+            page.append(line)
+            y += line_height // 2 if line[1] == 'blank' else line_height
+        pages.append(page)
+        if not lines:
+            return pages
+
+def render_document_pages(doc, template=None):
+    """The document's page images (RGB, IMAGE_WIDTH x IMAGE_HEIGHT), as few as its text fits on"""
+    style = TEMPLATES[template or template_for(doc)]
+    title_font = get_font(style['title_font'], TITLE_SIZE)
+    subtitle_font = get_font(style['font'], SUBTITLE_SIZE)
+    text_width = IMAGE_WIDTH - 2 * MARGIN
+    
+    measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    title = (doc.get('headline') or doc.get('title') or doc['id']).upper()
+    title_lines = wrap_text(measure, title, title_font, text_width)
+    subtitle = doc.get('subheadline') or ' · '.join(
+        str(doc[k]) for k in ('type', 'date') if doc.get(k))
+    subtitle_lines = wrap_text(measure, subtitle, subtitle_font, text_width) if subtitle else []
+    running_title = fit_line(measure, title, subtitle_font, text_width, ' (continued)')
+    
+    title_height = len(title_lines) * int(TITLE_SIZE * 1.25) + 10
+    subtitle_height = int(SUBTITLE_SIZE * 1.4)
+    first_top = MARGIN + title_height + len(subtitle_lines) * subtitle_height + 15 + 30
+    next_top = MARGIN + subtitle_height + 5 + 30
+    
+    # The largest body size that needs no more pages than the smallest would
+    layouts = []
+    for size in BODY_SIZES:
+        body_font = get_font(style['font'], size)
+        line_height = int(size * LINE_SPACING)
+        lines = content_lines(doc, measure, body_font, text_width)
+        layouts.append((body_font, line_height, paginate(lines, first_top, next_top, line_height)))
+    fewest = min(len(layout[2]) for layout in layouts)
+    body_font, line_height, page_lines = next(layout for layout in layouts if len(layout[2]) == fewest)
+    
+    pages = []
+    for lines in page_lines:
+        img = Image.new('RGB', (IMAGE_WIDTH, IMAGE_HEIGHT), color=style['background'])
+        draw = ImageDraw.Draw(img)
+        _draw_frame(draw, style)
+        y = MARGIN
+        
+        if not pages:
+            # Title block on the first page
+            for line in title_lines:
+                _centered(draw, line, title_font, y, style['accent'])
+                y += int(TITLE_SIZE * 1.25)
+            y += 10
+            for line in subtitle_lines:
+                _centered(draw, line, subtitle_font, y, style['muted'])
+                y += subtitle_height
+            y += 15
+        else:
+            # Running title on the pages after it
+            _centered(draw, running_title, subtitle_font, y, style['muted'])
+            y += subtitle_height + 5
+        draw.line([MARGIN, y, IMAGE_WIDTH - MARGIN, y], fill=style['accent'], width=2)
+        y += 30
+        
+        for text, kind, indent in lines:
+            if kind == 'blank':
+                y += line_height // 2
+                continue
+            fill = style['accent'] if kind == 'heading' else style['text']
+            draw.text((MARGIN + indent, y), text, fill=fill, font=body_font)
+            y += line_height
+        pages.append(img)
+    return pages
+
+def write_document_pdf(pdf_path, image_paths, qr_url):
+    """Letter pages with each page image at the top and the QR (vector modules) bottom right"""
+    width, height = letter
+    margin = 0.5 * inch
+    image_width, image_height = IMAGE_BOX
+    matrix = qr_matrix(qr_url, error_correction=QR_ERROR_CORRECTION, border=QR_BORDER)
+    
+    tmp_path = Path(pdf_path).with_name(Path(pdf_path).name + '.tmp')
+    c = canvas.Canvas(str(tmp_path), pagesize=letter)
+    for number, image_path in enumerate(image_paths, 1):
+        c.drawImage(str(image_path), (width - image_width) / 2, height - 1 * inch - image_height,
+                    width=image_width, height=image_height)
+        draw_qr_vector(c, matrix, width - QR_SIZE - margin, margin, QR_SIZE)
+        c.setFont("Helvetica", 10)
+        c.setFillColor(HexColor('#666666'))
+        c.drawCentredString(width / 2, 0.25 * inch, "Scan to view the full document")
+        if len(image_paths) > 1:
+            c.drawString(margin, margin, f"Page {number} of {len(image_paths)}")
+        c.showPage()
+    c.save()
+    os.replace(tmp_path, pdf_path)
+
+def _render_task(task):
+    """Worker: page images and PDF for one document; returns its manifest entry"""
+    doc_path, key, qr_url = task
+    start = time.perf_counter()
+    doc = load_document(doc_path)
+    template = template_for(doc)
+    
+    image_paths = []
+    for number, img in enumerate(render_document_pages(doc, template), 1):
+        suffix = '' if number == 1 else f"_p{number}"
+        image_path = IMAGES_DIR / f"{doc['id']}{suffix}.png"
+        atomic_save(img, image_path)
+        image_paths.append(image_path)
+        img.close()
+    # Pages left over from a longer version of the document
+    for stale in IMAGES_DIR.glob(f"{doc['id']}_p*.png"):
+        if stale not in image_paths and re.fullmatch(r'_p\d+', stale.stem[len(doc['id']):]):
+            stale.unlink()
+    pdf_path = OUTPUT_DIR / f"{doc['id']}.pdf"
+    write_document_pdf(pdf_path, image_paths, qr_url)
+    
+    return {
+        'key': key,
+        'template': template,
+        'qr_url': qr_url,
+        'pdf': pdf_path.relative_to(PROJECT_DIR).as_posix(),
+        'images': [p.relative_to(PROJECT_DIR).as_posix() for p in image_paths],
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+def render_key(doc_path, qr_url):
+    """Changes with the document's JSON, this script (its templates), the QR and font code, the fonts, and the QR target"""
+    fonts = {resolve_role(role) for role in ('serif', 'sans')}
+    return content_key({
+        'document': file_sha256(doc_path),
+        'source': source_fingerprint([__file__, SHARED_DIR / 'qr.py', SHARED_DIR / 'fonts.py']),
+        'fonts': file_fingerprint(sorted(f for f in fonts if f)),
+        'qr_url': qr_url,
+    })
+
+def _is_current(entry, key):
+    return (entry and entry.get('key') == key
+            and all((PROJECT_DIR / p).exists() for p in [entry['pdf'], *entry['images']]))
+
+def generate_documents(doc_paths, jobs=1, force=False):
+    """
+    Render every document in doc_paths that changed since the manifest in
+    OUTPUT_DIR was written (or all, with force). Returns
+    {'rendered': [ids], 'skipped': [ids], 'failed': {id: error}}.
+    """
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = OUTPUT_DIR / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    
+    stats = {'rendered': [], 'skipped': [], 'failed': {}}
+    tasks = []
+    ids = {}
+    for doc_path in doc_paths:
+        try:
+            doc_id = load_document(doc_path)['id']
+        except (OSError, ValueError) as e:
+            stats['failed'][Path(doc_path).stem] = str(e)
+            print(f"❌ {doc_path}: {e}")
+            continue
+        qr_url = document_url(doc_id)
+        key = render_key(doc_path, qr_url)
+        if not force and _is_current(manifest.get(doc_id), key):
+            stats['skipped'].append(doc_id)
+            continue
+        task = (str(doc_path), key, qr_url)
+        tasks.append(task)
+        ids[task] = doc_id
+    
+    try:
+        for task, entry, error in run_tasks(_render_task, tasks, jobs):
+            doc_id = ids[task]
+            if error is not None:
+                stats['failed'][doc_id] = str(error)
+                print(f"❌ {doc_id}: {error}")
+                continue
+            manifest[doc_id] = entry
+            stats['rendered'].append(doc_id)
+            pages = len(entry['images'])
+            print(f"✅ {entry['pdf']} ({entry['template']}, {pages} page{'s' if pages > 1 else ''}, "
+                  f"{entry['seconds']:.1f}s)")
+    finally:
+        # Keep whatever finished, even if a later document failed
+        if tasks:
+            atomic_write_json(dict(sorted(manifest.items())), manifest_path)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate printable document handouts from data/documents")
+    parser.add_argument("documents", nargs="*",
+                        help="Document JSON files or ids (default: every file in data/documents)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-render documents even if unchanged")
+    args = parser.parse_args()
+    
+    not_json = []
+    if args.documents:
+        doc_paths = [Path(d) if d.endswith('.json') else DOCUMENTS_DIR / f"{d}.json" for d in args.documents]
+        missing = [str(p) for p in doc_paths if not p.exists()]
+        if missing:
+            parser.error(f"No such document: {', '.join(missing)}")
+    else:
+        doc_paths = sorted(DOCUMENTS_DIR.glob('*.json'))
+        not_json = sorted(p for p in DOCUMENTS_DIR.iterdir() if p.is_file() and p.suffix != '.json')
+    
+    print(f"\n{'='*60}")
+    print(f"Document Handout Generator")
+    print(f"{'='*60}")
+    print(f"Documents: {len(doc_paths)} from {DOCUMENTS_DIR.relative_to(PROJECT_DIR)}/")
+    print(f"Output: {OUTPUT_DIR.relative_to(PROJECT_DIR)}/")
+    print(f"{'='*60}\n")
+    for path in not_json:
+        print(f"⏭️  Skipping {path.relative_to(PROJECT_DIR)} (not a JSON document)")
+    
+    start = time.perf_counter()
+    stats = generate_documents(doc_paths, jobs=args.jobs, force=args.force)
+    
+    print(f"\n📊 {len(stats['rendered'])} rendered, {len(stats['skipped'])} unchanged, "
+          f"{len(stats['failed'])} failed in {time.perf_counter() - start:.1f}s")
+    print(f"{'='*60}\n")
+    exit(1 if stats['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,148 +1,145 @@
 #!/usr/bin/env python3
 """
 Murder Mystery Invitation PDF Generator
-Creates an elegant 1920s-styled invitation
+Creates an elegant 1920s-styled invitation, or one per guest from a guest
+list: the shared background, borders and body text are rendered once
+(and cached), and only each guest's name, date and character are drawn
+onto a copy of it, in a process pool
 """
 
-from PIL import Image, ImageDraw, ImageFont
+import os
+import re
+import csv
+import sys
+import json
+import time
+from PIL import Image, ImageDraw
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
-def create_invitation_pdf(output_file="invitation.pdf"):
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.fonts import get_font, resolve_role
+from shared.pdf_writer import PDFPageWriter, encode_page
+from shared.render_cache import CACHE_ROOT, TileCache, content_key, file_fingerprint, source_fingerprint
+
+# Page settings (5x7 inches - standard invitation size)
+PAGE_WIDTH = 5.0
+PAGE_HEIGHT = 7.0
+DPI = 300  # High quality for printing
+
+# Colors
+BACKGROUND = '#f5f0e6'
+DARK_BROWN = '#2a1810'
+GOLD = '#8b7355'
+
+# Fields a guest list can set; the single invitation uses these
+DEFAULT_GUEST = {'name': 'friend', 'date': 'February 26th', 'character': ''}
+
+INVITATION_CACHE_DIR = CACHE_ROOT / 'invitations'
+
+def load_fonts():
+    # Snell Roundhand for headers, Georgia for body
+    # (or the closest installed script/serif fonts)
+    return {
+        'header': get_font('script', 72),
+        'script': get_font('script', 42),
+        'script_large': get_font('script', 52),
+        'signature': get_font('script', 48),
+        'body': get_font('serif', 30),
+        'small': get_font('serif', 26),
+    }
+
+def draw_invitation(page_img, fonts, guest=None, layer='all'):
     """
-    Create an elegant 1920s-styled invitation PDF.
+    Draw the invitation onto page_img. Lines containing {fields} are the
+    guest's; layer 'static' draws everything else (background art and the
+    shared text), 'personal' only the guest's lines, 'all' both. The same
+    walk down the page is used for every layer, so they line up exactly.
     """
-    
-    # Page settings (5x7 inches - standard invitation size)
-    page_width = 5.0
-    page_height = 7.0
-    dpi = 300  # High quality for printing
-    
-    # Convert to pixels
-    page_width_px = int(page_width * dpi)
-    page_height_px = int(page_height * dpi)
-    
-    print(f"\n{'='*60}")
-    print(f"Invitation PDF Generator - 1920s Style")
-    print(f"{'='*60}")
-    print(f"Size: {page_width}\" x {page_height}\"")
-    print(f"DPI: {dpi}")
-    print(f"{'='*60}\n")
-    
-    # Create page with cream/ivory background
-    page_img = Image.new('RGB', (page_width_px, page_height_px), color='#f5f0e6')
+    guest = {**DEFAULT_GUEST, **(guest or {})}
     draw = ImageDraw.Draw(page_img)
-    
-    # Load fonts - Snell Roundhand for headers, Georgia for body
-    try:
-        # Snell Roundhand for elegant script headers
-        script_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 42)
-        script_large = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 52)
-        signature_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 48)
-        # Georgia for readable body text
-        body_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 30)
-        italic_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 30)
-        small_font = ImageFont.truetype("/System/Library/Fonts/Georgia.ttf", 26)
-        title_font = script_large
-    except:
-        try:
-            script_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 42)
-            script_large = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 52)
-            signature_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 48)
-            body_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Georgia.ttf", 30)
-            italic_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Georgia.ttf", 30)
-            small_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Georgia.ttf", 26)
-            title_font = script_large
-        except:
-            title_font = ImageFont.load_default()
-            body_font = ImageFont.load_default()
-            italic_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-            signature_font = ImageFont.load_default()
-            script_font = ImageFont.load_default()
-            script_large = ImageFont.load_default()
-    
-    # Colors
-    dark_brown = '#2a1810'
-    gold = '#8b7355'
+    page_width_px, page_height_px = page_img.size
+    static = layer in ('static', 'all')
     
     # Margins
     margin = 80
     center_x = page_width_px // 2
     
-    # Draw decorative border
-    border_margin = 40
-    # Outer border
-    draw.rectangle(
-        [border_margin, border_margin, 
-         page_width_px - border_margin, page_height_px - border_margin],
-        outline=gold, width=3
-    )
-    # Inner border
-    draw.rectangle(
-        [border_margin + 15, border_margin + 15, 
-         page_width_px - border_margin - 15, page_height_px - border_margin - 15],
-        outline=gold, width=1
-    )
-    
-    # Decorative corners
-    corner_size = 30
-    corners = [
-        (border_margin + 8, border_margin + 8),  # top-left
-        (page_width_px - border_margin - 8, border_margin + 8),  # top-right
-        (border_margin + 8, page_height_px - border_margin - 8),  # bottom-left
-        (page_width_px - border_margin - 8, page_height_px - border_margin - 8),  # bottom-right
-    ]
-    for cx, cy in corners:
-        draw.line([(cx - corner_size//2, cy), (cx + corner_size//2, cy)], fill=gold, width=2)
-        draw.line([(cx, cy - corner_size//2), (cx, cy + corner_size//2)], fill=gold, width=2)
+    def centered(text, font, y, personal=None):
+        if personal is None:
+            personal = '{' in text
+        if personal and layer == 'static' or not personal and layer == 'personal':
+            return
+        if '{' in text:
+            text = text.format(**guest)
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        draw.text((center_x - text_width // 2, y), text, fill=DARK_BROWN, font=font)
     
-    current_y = margin + 30
+    if static:
+        # Draw decorative border
+        border_margin = 40
+        # Outer border
+        draw.rectangle(
+            [border_margin, border_margin,
+             page_width_px - border_margin, page_height_px - border_margin],
+            outline=GOLD, width=3
+        )
+        # Inner border
+        draw.rectangle(
+            [border_margin + 15, border_margin + 15,
+             page_width_px - border_margin - 15, page_height_px - border_margin - 15],
+            outline=GOLD, width=1
+        )
+        
+        # Decorative corners
+        corner_size = 30
+        corners = [
+            (border_margin + 8, border_margin + 8),  # top-left
+            (page_width_px - border_margin - 8, border_margin + 8),  # top-right
+            (border_margin + 8, page_height_px - border_margin - 8),  # bottom-left
+            (page_width_px - border_margin - 8, page_height_px - border_margin - 8),  # bottom-right
+        ]
+        for cx, cy in corners:
+            draw.line([(cx - corner_size//2, cy), (cx + corner_size//2, cy)], fill=GOLD, width=2)
+            draw.line([(cx, cy - corner_size//2), (cx, cy + corner_size//2)], fill=GOLD, width=2)
     
-    # Large header font for "You Are Invited"
-    try:
-        header_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/SnellRoundhand.ttc", 72)
-    except:
-        header_font = script_large
+    current_y = margin + 30
     
     # "You Are Invited" - big elegant header
-    text = "You Are Invited"
-    bbox = draw.textbbox((0, 0), text, font=header_font)
-    text_width = bbox[2] - bbox[0]
-    draw.text((center_x - text_width // 2, current_y), text, fill=dark_brown, font=header_font)
+    centered("You Are Invited", fonts['header'], current_y)
     current_y += 100
     
     # Decorative flourish under header
-    flourish_width = 150
-    draw.line([(center_x - flourish_width, current_y), (center_x + flourish_width, current_y)], 
-              fill=gold, width=2)
-    draw.ellipse([(center_x - 6, current_y - 6), (center_x + 6, current_y + 6)], fill=gold)
+    if static:
+        flourish_width = 150
+        draw.line([(center_x - flourish_width, current_y), (center_x + flourish_width, current_y)],
+                  fill=GOLD, width=2)
+        draw.ellipse([(center_x - 6, current_y - 6), (center_x + 6, current_y + 6)], fill=GOLD)
     current_y += 50
     
     # "Dear friend," in elegant script
-    text = "Dear friend,"
-    bbox = draw.textbbox((0, 0), text, font=script_large)
-    text_width = bbox[2] - bbox[0]
-    draw.text((center_x - text_width // 2, current_y), text, fill=dark_brown, font=script_large)
+    centered("Dear {name},", fonts['script_large'], current_y)
     current_y += 90
     
     # Main invitation text - shorter version
     lines = [
-        ("You are hereby cordially invited to", body_font),
-        ("an evening of extraordinary purpose.", body_font),
+        ("You are hereby cordially invited to", 'body'),
+        ("an evening of extraordinary purpose.", 'body'),
         ("", None),
-        ("For one hundred years, three souls have", body_font),
-        ("been trapped at the Mansion on Park Circle", body_font),
-        ("haunting its halls.", body_font),
+        ("For one hundred years, three souls have", 'body'),
+        ("been trapped at the Mansion on Park Circle", 'body'),
+        ("haunting its halls.", 'body'),
         ("", None),
-        ("On February 26th, I am assembling a group", body_font),
-        ("of investigators who I believe possess the", body_font),
-        ("ability to finally uncover the truth. I ask that", body_font),
-        ("you come with an open mind and", body_font),
-        ("a willingness to listen.", body_font),
+        ("On {date}, I am assembling a group", 'body'),
+        ("of investigators who I believe possess the", 'body'),
+        ("ability to finally uncover the truth. I ask that", 'body'),
+        ("you come with an open mind and", 'body'),
+        ("a willingness to listen.", 'body'),
         ("", None),
-        ("The dead have waited long enough.", script_font),
+        ("The dead have waited long enough.", 'script'),
         ("", None),
-        ("I do hope you will join us.", script_font),
+        ("I do hope you will join us.", 'script'),
     ]
     
     line_spacing = 38
@@ -150,52 +147,156 @@ def create_invitation_pdf(output_file="invitation.pdf"):
         if text == "":
             current_y += 20
             continue
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = center_x - text_width // 2
-        draw.text((x, current_y), text, fill=dark_brown, font=font)
+        centered(text, fonts[font], current_y)
         current_y += line_spacing
     
     current_y += 20
     
     # Signature
-    text = "— G. G."
-    bbox = draw.textbbox((0, 0), text, font=signature_font)
-    text_width = bbox[2] - bbox[0]
-    draw.text((center_x - text_width // 2, current_y), text, fill=dark_brown, font=signature_font)
+    centered("— G. G.", fonts['signature'], current_y)
     current_y += 80
     
     # Decorative line
-    line_width = 200
-    draw.line([(center_x - line_width//2, current_y), (center_x + line_width//2, current_y)], 
-              fill=gold, width=2)
-    draw.ellipse([(center_x - 5, current_y - 5), (center_x + 5, current_y + 5)], fill=gold)
+    if static:
+        line_width = 200
+        draw.line([(center_x - line_width//2, current_y), (center_x + line_width//2, current_y)],
+                  fill=GOLD, width=2)
+        draw.ellipse([(center_x - 5, current_y - 5), (center_x + 5, current_y + 5)], fill=GOLD)
     current_y += 40
     
     # Venue details
     venue_lines = [
-        ("Bembridge House", script_font),
+        ("Bembridge House", 'script'),
         ("", None),
-        ("953 Park Circle", small_font),
-        ("Long Beach, California", small_font),
+        ("953 Park Circle", 'small'),
+        ("Long Beach, California", 'small'),
         ("", None),
-        ("5 o'clock in the evening", body_font),
-        ("Early 20th century attire welcomed.", small_font),
-        ("Refreshments will be served.", small_font),
+        ("5 o'clock in the evening", 'body'),
+        ("Early 20th century attire welcomed.", 'small'),
+        ("Refreshments will be served.", 'small'),
     ]
     
     for text, font in venue_lines:
         if text == "":
             current_y += 15
             continue
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        x = center_x - text_width // 2
-        draw.text((x, current_y), text, fill=dark_brown, font=font)
+        centered(text, fonts[font], current_y)
         current_y += 36
     
-    # Save as PDF
-    page_img.save(output_file)
+    # The guest's character, last so it never moves the shared text
+    if guest['character']:
+        current_y += 40
+        centered("You will attend as", fonts['small'], current_y, personal=True)
+        current_y += 40
+        centered("{character}", fonts['script'], current_y)
+    
+    return page_img
+
+def page_size_px():
+    return int(PAGE_WIDTH * DPI), int(PAGE_HEIGHT * DPI)
+
+def static_layer_key():
+    """Changes whenever this script's drawing code or the fonts it resolves change"""
+    fonts = [resolve_role('script'), resolve_role('serif')]
+    return content_key({
+        'source': source_fingerprint([__file__]),
+        'fonts': file_fingerprint([f for f in fonts if f]),
+        'size': page_size_px(),
+    })
+
+def static_layer(cache=None):
+    """Background, borders and shared text, rendered once and kept in the cache"""
+    key = static_layer_key()
+    if cache:
+        img = cache.get(key)
+        if img is not None:
+            return img, True
+    img = Image.new('RGB', page_size_px(), color=BACKGROUND)
+    draw_invitation(img, load_fonts(), layer='static')
+    if cache:
+        cache.put(key, img)
+    return img, False
+
+def render_invitation(base, fonts, guest):
+    """One guest's invitation: a copy of the static layer plus their lines, encoded for the PDF"""
+    page_img = base.copy()
+    draw_invitation(page_img, fonts, guest, layer='personal')
+    return encode_page(page_img)
+
+_worker = {}
+
+def _init_worker(cache_dir):
+    _worker['base'], _ = static_layer(TileCache(cache_dir))
+    _worker['fonts'] = load_fonts()
+
+def _render_task(guest):
+    return render_invitation(_worker['base'], _worker['fonts'], guest)
+
+def render_invitations(guests, cache, jobs=1):
+    """Yield each guest's encoded page, in guest-list order"""
+    jobs = max(1, min(jobs, len(guests)))
+    if jobs <= 1:
+        base, _ = static_layer(cache)
+        fonts = load_fonts()
+        for guest in guests:
+            yield render_invitation(base, fonts, guest)
+        return
+    # Make sure the layer is cached before the workers look for it
+    static_layer(cache)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(str(cache.cache_dir),)) as pool:
+        yield from pool.map(_render_task, guests, chunksize=4)
+
+def load_guests(guest_file):
+    """Guests from a CSV (header row) or JSON list (or {"guests": [...]}) with name, character, date"""
+    guest_file = Path(guest_file)
+    if guest_file.suffix.lower() == '.csv':
+        with open(guest_file, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(guest_file, encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get('guests', [])
+    
+    guests = []
+    for row in rows:
+        row = {k.strip().lower(): '' if v is None else str(v).strip() for k, v in row.items() if k}
+        if not row.get('name'):
+            print(f"⚠️  Skipping guest without a name: {row}")
+            continue
+        guests.append({field: row.get(field) or DEFAULT_GUEST[field] for field in DEFAULT_GUEST})
+    return guests
+
+def guest_filename(guest, used):
+    stem = re.sub(r'[^a-z0-9]+', '_', guest['name'].lower()).strip('_') or 'guest'
+    name, n = stem, 1
+    while name in used:
+        n += 1
+        name = f"{stem}_{n}"
+    used.add(name)
+    return f"invitation_{name}.pdf"
+
+def create_invitation_pdf(output_file="invitation.pdf"):
+    """
+    Create an elegant 1920s-styled invitation PDF.
+    """
+    page_width_px, page_height_px = page_size_px()
+    
+    print(f"\n{'='*60}")
+    print(f"Invitation PDF Generator - 1920s Style")
+    print(f"{'='*60}")
+    print(f"Size: {PAGE_WIDTH}\" x {PAGE_HEIGHT}\"")
+    print(f"DPI: {DPI}")
+    print(f"{'='*60}\n")
+    
+    # Create page with cream/ivory background
+    page_img = Image.new('RGB', (page_width_px, page_height_px), color=BACKGROUND)
+    draw_invitation(page_img, load_fonts())
+    
+    # Save as PDF, at print size
+    with PDFPageWriter(output_file, resolution=DPI) as writer:
+        writer.add_page(page_img)
     
     print(f"✅ Invitation PDF created!")
     print(f"📄 Filename: {output_file}")
@@ -203,15 +304,72 @@ def create_invitation_pdf(output_file="invitation.pdf"):
     
     return True
 
+def create_guest_invitations(guest_file, output_dir=None, combined=None, jobs=1, cache_dir=INVITATION_CACHE_DIR):
+    """
+    One invitation per guest in guest_file: into output_dir as
+    invitation_<name>.pdf each, and/or all in one combined PDF.
+    """
+    guests = load_guests(guest_file)
+    if not guests:
+        print(f"❌ No guests in {guest_file}")
+        return False
+    
+    print(f"\n{'='*60}")
+    print(f"Invitation PDF Generator - 1920s Style")
+    print(f"{'='*60}")
+    print(f"Guests: {len(guests)} from {guest_file}")
+    print(f"Size: {PAGE_WIDTH}\" x {PAGE_HEIGHT}\" at {DPI} DPI")
+    print(f"{'='*60}\n")
+    
+    cache = TileCache(cache_dir)
+    start = time.perf_counter()
+    _, reused = static_layer(cache)
+    print(f"{'♻️  Reused' if reused else '🔨 Rendered'} static layer ({time.perf_counter() - start:.2f}s)")
+    
+    used = set()
+    filenames = [guest_filename(guest, used) for guest in guests]
+    combined_writer = PDFPageWriter(combined, resolution=DPI) if combined else None
+    try:
+        for guest, filename, page in zip(guests, filenames, render_invitations(guests, cache, jobs)):
+            if output_dir:
+                with PDFPageWriter(Path(output_dir) / filename, resolution=DPI) as writer:
+                    writer.add_encoded(page)
+            if combined_writer:
+                combined_writer.add_encoded(page)
+        if combined_writer:
+            combined_writer.close()
+    except BaseException:
+        if combined_writer:
+            combined_writer.abort()
+        raise
+    
+    elapsed = time.perf_counter() - start
+    if output_dir:
+        print(f"✅ {len(guests)} invitations in {output_dir}/")
+    if combined:
+        print(f"✅ Combined PDF: {combined} ({len(guests)} pages)")
+    print(f"📊 {elapsed:.2f}s total, {elapsed / len(guests) * 1000:.0f}ms per invitation")
+    print(f"{'='*60}\n")
+    return True
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description="Generate invitation PDF")
     parser.add_argument("--output", default="invitation.pdf", help="Output filename")
+    parser.add_argument("--guests", help="Guest list (CSV or JSON with name, character, date) - one invitation each")
+    parser.add_argument("--output-dir", help="With --guests: write invitation_<name>.pdf per guest here")
+    parser.add_argument("--combined", help="With --guests: write every invitation into this one PDF")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for --guests (default: CPU count)")
     args = parser.parse_args()
     
-    success = create_invitation_pdf(args.output)
+    if args.guests:
+        if not args.output_dir and not args.combined:
+            parser.error("--guests needs --output-dir and/or --combined")
+        success = create_guest_invitations(args.guests, args.output_dir, args.combined, args.jobs)
+    else:
+        success = create_invitation_pdf(args.output)
     exit(0 if success else 1)
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Journal Booklet Generator
+Lays out each diary in data/journals/ as a paginated prop booklet - a
+cover, then the entries in a handwriting font on ruled paper - using the
+book generator's entry parsing. Journals are built in a process pool, and
+one whose JSON (and this script) hasn't changed since its booklet was made
+is skipped, so editing one journal rebuilds only that booklet.
+"""
+
+import os
+import sys
+import json
+import time
+import difflib
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.fonts import BUNDLED_FONT_DIR, get_font, resolve_role
+from shared.pdf_writer import PDFPageWriter
+from shared.text_layout import font_metrics
+from shared.render_cache import (atomic_write_json, content_key, file_fingerprint, load_manifest, run_tasks,
+                                 source_fingerprint)
+from shared.batch_journal import file_sha256
+
+import generate_book_pdf
+from generate_book_pdf import format_entry
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+JOURNALS_DIR = PROJECT_DIR / 'data' / 'journals'
+JOURNALS_INDEX = PROJECT_DIR / 'data' / 'journals.json'
+OUTPUT_DIR = PROJECT_DIR / 'to_print' / 'journals'
+MANIFEST_NAME = 'manifest.json'
+SHARED_DIR = Path(__file__).resolve().parent.parent / 'shared'
+
+# Booklet pages: 5.5" x 8.5" (half letter)
+PAGE_WIDTH = 5.5
+PAGE_HEIGHT = 8.5
+DPI = 200
+MARGIN = 110
+
+# Colors
+PAPER = '#f3ead7'
+INK = '#2b2118'
+FADED_INK = '#7a6650'
+RULE = '#d8cbb0'
+
+# Every line of an entry sits on the page's ruled lines, PITCH apart
+PITCH = 56
+BODY_SIZE = 36
+TITLE_SIZE = 44
+
+# Fields some journals use in place of content/title
+CONTENT_FIELDS = ('content', 'entry', 'notes')
+TITLE_FIELDS = ('title', 'name', 'patient')
+DETAIL_FIELDS = [
+    ('sender', "From {}"),
+    ('recipient', "To {}"),
+    ('chief_complaint', "Complaint: {}"),
+    ('official_cause', "Official cause: {}"),
+]
+
+def load_fonts():
+    return {
+        'cover': get_font('handwriting', 72),
+        'title': get_font('handwriting', TITLE_SIZE),
+        'body': get_font('handwriting', BODY_SIZE),
+        'date': get_font('serif', 22),
+        'small': get_font('serif', 20),
+    }
+
+def journal_meta(journal_file, index_file=JOURNALS_INDEX):
+    """
+    Title, format and date for a journal file from data/journals.json. The
+    ids there don't always match the file names (hartley_consultation vs
+    hartley_consulatations.json), so the closest id is used.
+    """
+    stem = Path(journal_file).stem
+    meta = {'title': stem.replace('_', ' ').title(), 'format': '', 'date': ''}
+    try:
+        with open(index_file, encoding='utf-8') as f:
+            journals = {j['id']: j for j in json.load(f).get('journals', []) if j.get('id')}
+    except (OSError, ValueError):
+        return meta
+    match = difflib.get_close_matches(stem, list(journals), n=1, cutoff=0.75)
+    if match:
+        item = journals[match[0]]
+        meta.update({k: item.get(k) or meta[k] for k in meta})
+    return meta
+
+def journal_entry(entry):
+    """(date, title, paragraphs) for one journal entry, parsed like the book's entries"""
+    content = next((entry[k] for k in CONTENT_FIELDS if entry.get(k)), '')
+    details = [template.format(entry[k]) for k, template in DETAIL_FIELDS if entry.get(k)]
+    if details:
+        content = '\n'.join(details) + '\n\n' + content
+    header, title, text, _ = format_entry({
+        'date': display_date(entry.get('date', '')),
+        'title': next((entry[k] for k in TITLE_FIELDS if entry.get(k)), ''),
+        'content': content,
+    })
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    return header, title, paragraphs
+
+def display_date(date):
+    """1925-08-15 -> August 15, 1925; other dates as written"""
+    try:
+        day = datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return date
+    return f"{day:%B} {day.day}, {day.year}"
+
+def booklet_rows(entries, fonts, text_width):
+    """
+    The booklet's content as rows on the ruled grid: (kind, text) with kind
+    'date', 'title', 'body', 'blank' or 'break' (between entries).
+    """
+    body = font_metrics(fonts['body'])
+    title = font_metrics(fonts['title'])
+    rows = []
+    for entry in entries:
+        header, entry_title, paragraphs = journal_entry(entry)
+        if rows:
+            rows.append(('break', ''))
+        if header:
+            rows.append(('date', header.upper()))
+        for line, _ in title.wrap(entry_title, text_width) if entry_title else []:
+            rows.append(('title', line))
+        for i, paragraph in enumerate(paragraphs):
+            if i:
+                rows.append(('blank', ''))
+            rows.extend(('body', line) for line, _ in body.wrap(paragraph, text_width))
+    return rows
+
+def paginate(rows, rows_per_page):
+    """Split rows into pages; an entry's date and title never end a page without its first lines"""
+    pages = [[]]
+    i = 0
+    while i < len(rows):
+        page = pages[-1]
+        kind = rows[i][0]
+        if kind in ('break', 'blank') and not page:
+            i += 1
+            continue
+        if kind in ('date', 'title', 'break'):
+            # The heading and two lines of text must fit together
+            heading = i
+            while heading < len(rows) and rows[heading][0] in ('break', 'date', 'title'):
+                heading += 1
+            if page and len(page) + (heading - i) + 2 > rows_per_page:
+                pages.append([])
+                continue
+        if len(page) >= rows_per_page:
+            pages.append([])
+            continue
+        page.append(rows[i])
+        i += 1
+    return [page for page in pages if page]
+
+def _centered(draw, text, font, y, fill, width):
+    text_width = draw.textlength(text, font=font)
+    draw.text(((width - text_width) // 2, y), text, fill=fill, font=font)
+
+def draw_cover(meta, fonts, size):
+    page_width_px, page_height_px = size
+    page = Image.new('RGB', size, color=PAPER)
+    draw = ImageDraw.Draw(page)
+    draw.rectangle([50, 50, page_width_px - 50, page_height_px - 50], outline=FADED_INK, width=3)
+    draw.rectangle([62, 62, page_width_px - 62, page_height_px - 62], outline=FADED_INK, width=1)
+    
+    cover = font_metrics(fonts['cover'])
+    lines = cover.wrap(meta['title'], page_width_px - 2 * MARGIN)
+    line_height = int(cover.line_height * 1.1)
+    y = (page_height_px - len(lines) * line_height) // 2 - 80
+    for line, _ in lines:
+        _centered(draw, line, fonts['cover'], y, INK, page_width_px)
+        y += line_height
+    y += 30
+    draw.line([(page_width_px // 2 - 120, y), (page_width_px // 2 + 120, y)], fill=FADED_INK, width=2)
+    y += 40
+    small = font_metrics(fonts['small'])
+    for text in (meta['date'], meta['format']):
+        for line, _ in small.wrap(text, page_width_px - 2 * MARGIN) if text else []:
+            _centered(draw, line, fonts['small'], y, FADED_INK, page_width_px)
+            y += int(small.line_height * 1.4)
+    return page
+
+def draw_page(rows, number, meta, fonts, size):
+    page_width_px, page_height_px = size
+    page = Image.new('RGB', size, color=PAPER)
+    draw = ImageDraw.Draw(page)
+    
+    # Running title and page number
+    _centered(draw, meta['title'], fonts['small'], MARGIN // 2, FADED_INK, page_width_px)
+    _centered(draw, str(number), fonts['small'], page_height_px - MARGIN // 2 - 20, FADED_INK, page_width_px)
+    
+    # Ruled lines down the whole page, the text written on them
+    top = MARGIN
+    bottom = page_height_px - MARGIN
+    y = top
+    while y + PITCH <= bottom:
+        draw.line([(MARGIN - 20, y + PITCH - 10), (page_width_px - MARGIN + 20, y + PITCH - 10)],
+                  fill=RULE, width=1)
+        y += PITCH
+    
+    y = top
+    for kind, text in rows:
+        if kind == 'date':
+            draw.text((MARGIN, y + PITCH - 38), text, fill=FADED_INK, font=fonts['date'])
+        elif kind == 'title':
+            draw.text((MARGIN, y + PITCH - 14 - TITLE_SIZE), text, fill=INK, font=fonts['title'])
+        elif kind == 'body':
+            draw.text((MARGIN, y + PITCH - 14 - BODY_SIZE), text, fill=INK, font=fonts['body'])
+        elif kind == 'break':
+            _centered(draw, '~', fonts['title'], y + PITCH - 14 - TITLE_SIZE, FADED_INK, page_width_px)
+        y += PITCH
+    return page
+
+def render_booklet(journal_file, output_file, meta, spoilers=True):
+    """Write one journal's booklet PDF; returns its page count"""
+    with open(journal_file, encoding='utf-8') as f:
+        entries = json.load(f).get('entries', [])
+    if not spoilers:
+        entries = [e for e in entries if not e.get('is_spoiler')]
+    
+    size = (int(PAGE_WIDTH * DPI), int(PAGE_HEIGHT * DPI))
+    fonts = load_fonts()
+    rows = booklet_rows(entries, fonts, size[0] - 2 * MARGIN)
+    rows_per_page = (size[1] - 2 * MARGIN) // PITCH
+    
+    with PDFPageWriter(output_file, resolution=DPI) as writer:
+        writer.add_page(draw_cover(meta, fonts, size))
+        for number, page_rows in enumerate(paginate(rows, rows_per_page), 1):
+            writer.add_page(draw_page(page_rows, number, meta, fonts, size))
+        return writer.page_count
+
+def _render_task(task):
+    """Worker: one journal's booklet; returns its manifest entry"""
+    journal_file, output_file, key, meta, spoilers = task
+    start = time.perf_counter()
+    pages = render_booklet(journal_file, output_file, meta, spoilers)
+    return {
+        'key': key,
+        'title': meta['title'],
+        'pdf': Path(output_file).relative_to(PROJECT_DIR).as_posix(),
+        'pages': pages,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+def booklet_key(journal_file, meta, spoilers):
+    """Changes with the journal's JSON and index entry, the layout, parsing, wrapping, font and PDF code, and the fonts"""
+    fonts = {resolve_role(role) for role in ('handwriting', 'serif')}
+    return content_key({
+        'journal': file_sha256(journal_file),
+        'meta': meta,
+        'source': source_fingerprint([__file__, generate_book_pdf.__file__, SHARED_DIR / 'text_layout.py',
+                                      SHARED_DIR / 'fonts.py', SHARED_DIR / 'pdf_writer.py']),
+        'fonts': file_fingerprint(sorted(f for f in fonts if f)),
+        'spoilers': spoilers,
+    })
+
+def generate_booklets(journal_files, jobs=1, force=False, spoilers=True):
+    """
+    Build a booklet in OUTPUT_DIR for each journal file that changed since
+    the manifest there was written (or all, with force). Returns
+    {'built': [names], 'skipped': [names], 'failed': {name: error}}.
+    """
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = OUTPUT_DIR / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    
+    stats = {'built': [], 'skipped': [], 'failed': {}}
+    tasks = []
+    for journal_file in journal_files:
+        name = Path(journal_file).stem
+        meta = journal_meta(journal_file)
+        key = booklet_key(journal_file, meta, spoilers)
+        entry = manifest.get(name)
+        output_file = OUTPUT_DIR / f"{name}.pdf"
+        if not force and entry and entry.get('key') == key and output_file.exists():
+            stats['skipped'].append(name)
+            continue
+        tasks.append((str(journal_file), str(output_file), key, meta, spoilers))
+    
+    try:
+        for task, entry, error in run_tasks(_render_task, tasks, jobs):
+            name = Path(task[0]).stem
+            if error is not None:
+                stats['failed'][name] = str(error)
+                print(f"❌ {name}: {error}")
+                continue
+            manifest[name] = entry
+            stats['built'].append(name)
+            print(f"✅ {entry['pdf']} - {entry['title']} ({entry['pages']} pages, {entry['seconds']:.1f}s)")
+    finally:
+        # Keep whatever finished, even if a later journal failed
+        if tasks:
+            atomic_write_json(dict(sorted(manifest.items())), manifest_path)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate printable journal booklets from data/journals")
+    parser.add_argument("journals", nargs="*",
+                        help="Journal JSON files or names (default: every file in data/journals)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rebuild booklets even if unchanged")
+    parser.add_argument("--no-spoilers", action="store_true",
+                        help="Leave out entries marked is_spoiler (handed out separately)")
+    args = parser.parse_args()
+    
+    if args.journals:
+        journal_files = [Path(j) if j.endswith('.json') else JOURNALS_DIR / f"{j}.json" for j in args.journals]
+        missing = [str(p) for p in journal_files if not p.exists()]
+        if missing:
+            parser.error(f"No such journal: {', '.join(missing)}")
+    else:
+        journal_files = sorted(JOURNALS_DIR.glob('*.json'))
+    
+    print(f"\n{'='*60}")
+    print(f"Journal Booklet Generator")
+    print(f"{'='*60}")
+    print(f"Journals: {len(journal_files)} from {JOURNALS_DIR.relative_to(PROJECT_DIR)}/")
+    print(f"Page size: {PAGE_WIDTH}\" x {PAGE_HEIGHT}\" at {DPI} DPI")
+    print(f"Handwriting font: {resolve_role('handwriting') or 'PIL default'}")
+    print(f"{'='*60}\n")
+    if not resolve_role('handwriting', fallbacks=False):
+        print(f"⚠️  No handwriting font installed, falling back to the font above - "
+              f"put e.g. Caveat-Regular.ttf in {BUNDLED_FONT_DIR.relative_to(PROJECT_DIR)}/\n")
+    
+    start = time.perf_counter()
+    stats = generate_booklets(journal_files, jobs=args.jobs, force=args.force, spoilers=not args.no_spoilers)
+    
+    print(f"\n📊 {len(stats['built'])} booklets built, {len(stats['skipped'])} unchanged, "
+          f"{len(stats['failed'])} failed in {time.perf_counter() - start:.1f}s")
+    print(f"{'='*60}\n")
+    exit(1 if stats['failed'] else 0)
+
+if __name__ == "__main__":
+    main()